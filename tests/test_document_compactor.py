@@ -0,0 +1,108 @@
+"""Tests for the LLM-backed document compactor's byte budget handling."""
+
+import asyncio
+
+import pytest
+
+from indexer.vectorize_lib.compact import DocumentCompactor
+
+
+class FakeResponse:
+    def __init__(self, output_text):
+        self.output_text = output_text
+
+
+class FakeResponses:
+    """Stand-in for ``client.responses`` that returns canned output."""
+
+    def __init__(self, output_text):
+        self.output_text = output_text
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return FakeResponse(self.output_text)
+
+
+class FakeAsyncResponses(FakeResponses):
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return FakeResponse(self.output_text)
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+
+
+@pytest.fixture(autouse=True)
+def _openai_model(monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL", "test-model")
+
+
+def make_compactor(output_text, target_bytes=100):
+    responses = FakeResponses(output_text)
+    compactor = DocumentCompactor(
+        client=FakeClient(responses), target_bytes=target_bytes
+    )
+    return compactor, responses
+
+
+def test_compact_small_document_skips_llm():
+    """Test that documents within budget are returned untouched."""
+    compactor, responses = make_compactor("unused")
+
+    result = compactor.compact(doc_id="doc", text="short text")
+
+    assert result.text == "short text"
+    assert result.was_compacted is False
+    assert responses.calls == 0
+
+
+def test_compact_uses_llm_output_within_budget():
+    """Test that LLM output within budget is used as-is."""
+    compactor, responses = make_compactor("  compacted  ")
+
+    result = compactor.compact(doc_id="doc", text="x" * 500)
+
+    assert result.text == "compacted"
+    assert result.was_compacted is True
+    assert responses.calls == 1
+
+
+@pytest.mark.parametrize("char", ["é", "€", "😀"])
+def test_compact_trims_on_codepoint_boundary(char):
+    """Test that hard trimming never splits a multi-byte character."""
+    # Empty LLM output falls back to trimming the original document.
+    compactor, _ = make_compactor("", target_bytes=101)
+    text = "a" + char * 200
+
+    result = compactor.compact(doc_id="doc", text=text)
+
+    encoded = result.text.encode("utf-8")
+    assert len(encoded) <= 101
+    assert len(encoded) > 101 - len(char.encode("utf-8"))
+    assert text.startswith(result.text)
+    assert result.was_compacted is True
+
+
+def test_compact_many_preserves_order():
+    """Test that concurrent compaction returns results in request order."""
+    async_responses = FakeAsyncResponses("compacted")
+    compactor = DocumentCompactor(
+        client=FakeClient(FakeResponses("unused")),
+        async_client=FakeClient(async_responses),
+        target_bytes=100,
+    )
+    requests = [
+        {"doc_id": "big-1", "text": "x" * 500},
+        {"doc_id": "small", "text": "fits"},
+        {"doc_id": "big-2", "text": "y" * 500},
+    ]
+
+    results = asyncio.run(compactor.compact_many(requests, concurrency=2))
+
+    assert [r.text for r in results] == ["compacted", "fits", "compacted"]
+    assert [r.was_compacted for r in results] == [True, False, True]
+    assert async_responses.calls == 2
@@ -0,0 +1,63 @@
+"""Tests for CSV document iteration and byte-offset resume."""
+
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from indexer.vectorize_lib.documents import ModelSpec, ResumeState, iter_documents
+
+
+class Row(BaseModel):
+    name: Optional[str] = None
+    notes: Optional[str] = None
+
+
+SPEC = ModelSpec(model=Row, semantic_fields=("name", "notes"), keyword_fields=())
+
+
+@pytest.fixture
+def large_csv(tmp_path):
+    """CSV well past one read chunk of the old text wrapper."""
+    path = tmp_path / "rows.csv"
+    lines = ["name,notes"] + [f"row {i},note {i}" for i in range(2000)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def names(documents):
+    return [text.split("\n", 1)[0] for _, _, text, _ in documents]
+
+
+def test_iter_documents_handles_bom_crlf_and_quoted_newlines(tmp_path):
+    """Test that BOM, CRLF line endings and multi-line fields parse as before."""
+    path = tmp_path / "rows.csv"
+    path.write_bytes(
+        b'\xef\xbb\xbfname,notes\r\nalpha,"line one\r\nline two"\r\n\r\nb\xc3\xa9ta,x\r\n'
+    )
+
+    documents = list(iter_documents("Row", path, SPEC, {}))
+
+    assert [row_index for row_index, _, _, _ in documents] == [1, 2]
+    assert "line one\r\nline two" in documents[0][2]
+    assert documents[1][2] == "béta\nx"
+
+
+@pytest.mark.parametrize("consumed", [1, 10, 1500])
+def test_resume_offset_points_at_next_row(large_csv, consumed):
+    """Test that resuming from the recorded offset continues at the next row."""
+    full = list(iter_documents("Row", large_csv, SPEC, {}))
+
+    state = ResumeState()
+    documents = iter_documents("Row", large_csv, SPEC, {}, resume_state=state)
+    first = [next(documents) for _ in range(consumed)]
+    documents.close()
+    assert state.row_index == consumed
+
+    resumed_state = ResumeState(
+        offset=state.offset, row_index=state.row_index, fieldnames=state.fieldnames
+    )
+    rest = list(iter_documents("Row", large_csv, SPEC, {}, resume_state=resumed_state))
+
+    assert first + rest == full
+    assert names(rest[:1]) == [f"row {consumed}"]
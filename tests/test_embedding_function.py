@@ -0,0 +1,53 @@
+"""Tests for the concurrent OpenAI embedding function."""
+
+import threading
+
+from indexer.vectorize_lib.indexing import ConcurrentOpenAIEmbeddingFunction
+
+
+class FakeEmbedding:
+    def __init__(self, embedding):
+        self.embedding = embedding
+
+
+class FakeEmbeddingsResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeEmbeddings:
+    """Stand-in for ``client.embeddings`` that embeds a text as its length."""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input, **kwargs):
+        with self._lock:
+            self.batch_sizes.append(len(input))
+        return FakeEmbeddingsResponse(
+            [FakeEmbedding([float(len(text)), 1.0]) for text in input]
+        )
+
+
+class FakeClient:
+    def __init__(self):
+        self.embeddings = FakeEmbeddings()
+
+
+def test_embeddings_split_into_sub_batches_keep_input_order():
+    """Test that sub-batches run concurrently but embeddings stay in order."""
+    function = ConcurrentOpenAIEmbeddingFunction(
+        api_key="test-key",
+        model_name="text-embedding-3-small",
+        sub_batch_size=4,
+        max_concurrency=3,
+    )
+    function.client = FakeClient()
+    texts = ["x" * length for length in range(1, 11)]
+
+    embeddings = function(texts)
+
+    assert [embedding[0] for embedding in embeddings] == list(range(1, 11))
+    assert sorted(function.client.embeddings.batch_sizes) == [2, 4, 4]
+    assert function.name() == "openai"
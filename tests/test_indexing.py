@@ -0,0 +1,330 @@
+"""Tests for the indexing pipeline's prefetching, retries and duplicate precheck."""
+
+import threading
+from typing import Optional
+
+import httpx
+import openai
+import pytest
+from chromadb import errors as chroma_errors
+from pydantic import BaseModel
+
+from indexer.models import ModelSpec
+from indexer.vectorize_lib import indexing
+from indexer.vectorize_lib.configuration import ModelConfig
+from indexer.vectorize_lib.documents import ResumeState
+from indexer.vectorize_lib.indexing import _prefetch_documents
+
+
+def row_offset(row_index):
+    return row_index * 10
+
+
+def fake_documents(rows, fail_after=None):
+    """Build an ``open_documents`` stand-in that tracks its position like
+    ``iter_documents`` does."""
+
+    closed = threading.Event()
+
+    def open_documents(state):
+        try:
+            row_index = state.row_index
+            while rows is None or row_index < rows:
+                if fail_after is not None and row_index >= fail_after:
+                    raise ValueError(f"bad row {row_index + 1}")
+                row_index += 1
+                state.row_index = row_index
+                state.offset = row_offset(row_index)
+                state.fieldnames = ("name",)
+                yield row_index, f"M:{row_index}", f"row {row_index}", {}
+        finally:
+            closed.set()
+
+    return open_documents, closed
+
+
+def reader_threads():
+    return [t for t in threading.enumerate() if t.name == "idxr-csv-reader"]
+
+
+@pytest.mark.parametrize("consumed", [1, 64, 65, 150])
+def test_prefetch_resume_state_tracks_yielded_rows(consumed):
+    """Test that the caller's resume state follows yields, not the read-ahead."""
+    open_documents, _ = fake_documents(200)
+    state = ResumeState()
+    documents = _prefetch_documents(open_documents, state)
+
+    for _ in range(consumed):
+        document, token_count = next(documents)
+
+    assert document[0] == consumed
+    assert token_count is None
+    assert state.row_index == consumed
+    assert state.offset == row_offset(consumed)
+    assert state.fieldnames == ("name",)
+    documents.close()
+
+
+def test_prefetch_reraises_reader_error_after_earlier_rows():
+    """Test that a mid-file error surfaces after the rows read before it."""
+    open_documents, _ = fake_documents(200, fail_after=100)
+    state = ResumeState()
+    seen = []
+
+    with pytest.raises(ValueError, match="bad row 101"):
+        for document, _ in _prefetch_documents(open_documents, state):
+            seen.append(document[0])
+
+    assert seen == list(range(1, 101))
+    assert state.row_index == 100
+    assert state.offset == row_offset(100)
+    assert not reader_threads()
+
+
+def test_prefetch_close_stops_reader_thread():
+    """Test that closing the generator early stops and joins the reader."""
+    open_documents, closed = fake_documents(None)
+    documents = _prefetch_documents(open_documents, ResumeState())
+
+    assert [next(documents)[0][0] for _ in range(3)] == [1, 2, 3]
+    documents.close()
+
+    assert closed.is_set()
+    assert not reader_threads()
+
+
+class Row(BaseModel):
+    name: Optional[str] = None
+
+
+REGISTRY = {"Row": ModelSpec(model=Row, semantic_fields=("name",), keyword_fields=())}
+
+
+class WordEncoder:
+    def encode(self, text, **kwargs):
+        return text.split()
+
+
+class FakeCollection:
+    """In-memory collection whose upserts can be made to fail.
+
+    Each upsert consumes one entry of ``failures``: an exception to raise, or
+    a callable building one from the upserted IDs.
+    """
+
+    def __init__(self, existing=(), failures=()):
+        self.ids = set(existing)
+        self.failures = list(failures)
+        self.upserts = []
+        self.gets = []
+        self.scans = 0
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, ids=None, include=None, limit=None, offset=0):
+        if ids is None:
+            self.scans += 1
+            return {"ids": sorted(self.ids)[offset : offset + limit]}
+        self.gets.append(list(ids))
+        return {"ids": [doc_id for doc_id in ids if doc_id in self.ids]}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserts.append(list(ids))
+        if self.failures:
+            failure = self.failures.pop(0)
+            raise failure(ids) if callable(failure) else failure
+        self.ids.update(ids)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(indexing.time, "sleep", recorded.append)
+    return recorded
+
+
+def run_index(tmp_path, collection, rows=5, batch_size=10, names=None):
+    if names is None:
+        names = [f"row {i}" for i in range(rows)]
+    path = tmp_path / "rows.csv"
+    path.write_text("name\n" + "".join(f"{name}\n" for name in names), encoding="utf-8")
+    return indexing.index_from_config(
+        collection,
+        {"Row": ModelConfig(path=path, columns={})},
+        batch_size,
+        model_registry=REGISTRY,
+        encoder=WordEncoder(),
+        error_report_dir=tmp_path / "reports",
+    )
+
+
+def error_reports(tmp_path):
+    return sorted((tmp_path / "reports").rglob("*.yaml"))
+
+
+def rate_limit_error(code):
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api"))
+    return openai.RateLimitError("rate limited", response=response, body={"code": code})
+
+
+def test_transient_upsert_error_is_retried(tmp_path, sleeps):
+    """Test that a transient failure is retried and the batch then lands."""
+    collection = FakeCollection(failures=[ConnectionError("reset")])
+
+    counts = run_index(tmp_path, collection)
+
+    assert counts == {"Row": 5}
+    assert len(collection.upserts) == 2
+    assert collection.upserts[0] == collection.upserts[1]
+    assert len(sleeps) == 1
+    assert not error_reports(tmp_path)
+
+
+def test_upsert_retries_are_bounded(tmp_path, sleeps):
+    """Test that exhausting the retry budget re-raises and writes a report."""
+    failures = [ConnectionError("reset")] * (indexing.UPSERT_MAX_RETRIES + 1)
+    collection = FakeCollection(failures=failures)
+
+    with pytest.raises(ConnectionError):
+        run_index(tmp_path, collection)
+
+    assert len(collection.upserts) == indexing.UPSERT_MAX_RETRIES + 1
+    assert len(sleeps) == indexing.UPSERT_MAX_RETRIES
+    assert all(delay <= indexing.UPSERT_RETRY_MAX_SECONDS for delay in sleeps)
+    assert len(error_reports(tmp_path)) == 1
+
+
+@pytest.mark.parametrize(
+    "error",
+    [ValueError("bad metadata"), rate_limit_error("insufficient_quota")],
+    ids=["non-transient", "insufficient-quota"],
+)
+def test_permanent_upsert_error_is_not_retried(tmp_path, sleeps, error):
+    """Test that errors waiting cannot fix are raised on the first failure."""
+    collection = FakeCollection(failures=[error])
+
+    with pytest.raises(type(error)):
+        run_index(tmp_path, collection)
+
+    assert len(collection.upserts) == 1
+    assert not sleeps
+    assert len(error_reports(tmp_path)) == 1
+
+
+def test_rate_limit_is_retried(tmp_path, sleeps):
+    """Test that an ordinary OpenAI rate limit is treated as transient."""
+    collection = FakeCollection(failures=[rate_limit_error("rate_limit_exceeded")])
+
+    assert run_index(tmp_path, collection) == {"Row": 5}
+    assert len(sleeps) == 1
+
+
+def test_duplicate_removal_keeps_the_retry_budget(tmp_path, sleeps):
+    """Test that a duplicate-ID restart does not refill the retry budget."""
+
+    def duplicate(ids):
+        return chroma_errors.DuplicateIDError(f"duplicate ids: {ids[0]}")
+
+    half = indexing.UPSERT_MAX_RETRIES // 2 + 1
+    failures = [ConnectionError("reset")] * half + [duplicate]
+    failures += [ConnectionError("reset")] * half
+    collection = FakeCollection(failures=failures)
+
+    with pytest.raises(ConnectionError):
+        run_index(tmp_path, collection)
+
+    assert len(sleeps) == indexing.UPSERT_MAX_RETRIES
+
+
+def test_id_filter_error_rate_at_capacity():
+    """Test that the filter never misses an added ID and keeps its error rate."""
+    id_filter = indexing._IdFilter(20_000, 0.01)
+    added = [f"Row:{i:040x}" for i in range(20_000)]
+    id_filter.update(added)
+
+    assert all(doc_id in id_filter for doc_id in added)
+    assert not id_filter.full
+    others = [f"Other:{i:040x}" for i in range(20_000)]
+    false_positives = sum(doc_id in id_filter for doc_id in others)
+    assert false_positives / len(others) < 0.02
+
+    id_filter.add("Row:one-more")
+    assert id_filter.full
+
+
+def test_precheck_switches_to_id_filter(tmp_path, monkeypatch, caplog):
+    """Test that outgrowing known_ids moves the precheck to the filter."""
+    monkeypatch.setattr(indexing, "KNOWN_ID_LIMIT", 4)
+    names = [f"row {i}" for i in range(10)] + ["row 1", "row 10"]
+    collection = FakeCollection()
+
+    with caplog.at_level("INFO"):
+        counts = run_index(tmp_path, collection, batch_size=2, names=names)
+
+    assert "now use an approximate filter" in caplog.text
+    assert counts == {"Row": 11}
+    # Only the repeated row was a filter candidate worth asking Chroma about.
+    assert len(collection.gets) == 1
+    assert len(collection.gets[0]) == 1
+    assert collection.gets[0][0] in collection.upserts[0]
+    assert sum(len(ids) for ids in collection.upserts) == 11
+
+
+def test_full_id_filter_is_reloaded(tmp_path, monkeypatch, caplog):
+    """Test that a filter past its capacity is rebuilt from the collection."""
+    monkeypatch.setattr(indexing, "KNOWN_ID_LIMIT", 2)
+    collection = FakeCollection()
+
+    with caplog.at_level("INFO"):
+        counts = run_index(tmp_path, collection, rows=12, batch_size=2)
+
+    assert counts == {"Row": 12}
+    assert "reloading it from the collection" in caplog.text
+    assert collection.scans >= 1
+    assert not collection.gets
+
+
+def write_report(tmp_path, metadata=None):
+    return indexing._write_error_report(
+        error_dir=tmp_path,
+        model_name="Row",
+        collection_name="rows",
+        reason="batch",
+        source_csv=tmp_path / "rows.csv",
+        emitted_ids=["Row:1"],
+        emitted_docs=["row 1"],
+        emitted_metas=[metadata or {}],
+        emitted_rows=[1],
+        token_counts=[2],
+        token_total=2,
+        resume_state=ResumeState(row_index=1, fieldnames=("name",)),
+        exception=RuntimeError("boom"),
+        traceback_text="",
+    )
+
+
+def test_error_report_names_are_claimed_once(tmp_path, monkeypatch):
+    """Test that same-instant reports get suffixes until the names run out."""
+    monkeypatch.setattr(indexing, "ERROR_REPORT_MAX_SUFFIXES", 3)
+    frozen = indexing.datetime(2026, 1, 1, tzinfo=indexing.timezone.utc)
+    monkeypatch.setattr(
+        indexing,
+        "datetime",
+        type("Frozen", (), {"now": staticmethod(lambda tz: frozen)}),
+    )
+
+    paths = [write_report(tmp_path) for _ in range(4)]
+
+    assert [path.name for path in paths[:3]] == [
+        "20260101T000000000000Z_Row.yaml",
+        "20260101T000000000000Z_Row_1.yaml",
+        "20260101T000000000000Z_Row_2.yaml",
+    ]
+    assert paths[3] is None
+
+
+def test_failed_error_report_is_removed(tmp_path):
+    """Test that a report that fails to serialize leaves no partial file."""
+    assert write_report(tmp_path, metadata={"bad": object()}) is None
+    assert not list((tmp_path / "errors").iterdir())
@@ -1,142 +1,267 @@
 """Tests for AsyncMultiCollectionQueryClient using ChromaDB in-memory client."""
 
+import copy
 import json
+import re
 import pytest
+import pytest_asyncio
 from pathlib import Path
-from tempfile import TemporaryDirectory
-from unittest.mock import AsyncMock, patch
 
+import chromadb
+
+from indexer.vectorize_lib import query_client
 from indexer.vectorize_lib.query_client import AsyncMultiCollectionQueryClient
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
 
-@pytest.fixture
-def query_config_data():
-    """Sample query config data."""
-    return {
-        "model_to_collections": {
-            "Table": {
-                "collections": ["partition_00001", "partition_00002"],
-                "total_documents": 1500,
-                "partitions": ["partition_00001", "partition_00002"],
-            },
-            "Field": {
-                "collections": ["partition_00002", "partition_00003"],
-                "total_documents": 1100,
-                "partitions": ["partition_00002", "partition_00003"],
-            },
-            "Domain": {
-                "collections": ["partition_00003"],
-                "total_documents": 300,
-                "partitions": ["partition_00003"],
-            },
+
+def _dumps(payload) -> bytes:
+    """Serialize fixture payloads to UTF-8 JSON bytes, preferring orjson."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+QUERY_CONFIG = {
+    "model_to_collections": {
+        "Table": {
+            "collections": ["partition_00001", "partition_00002"],
+            "total_documents": 1500,
+            "partitions": ["partition_00001", "partition_00002"],
         },
-        "collection_to_models": {
-            "partition_00001": ["Table"],
-            "partition_00002": ["Table", "Field"],
-            "partition_00003": ["Field", "Domain"],
+        "Field": {
+            "collections": ["partition_00002", "partition_00003"],
+            "total_documents": 1100,
+            "partitions": ["partition_00002", "partition_00003"],
         },
-        "metadata": {
-            "total_collections": 3,
-            "total_models": 3,
-            "generated_at": "2025-10-31T12:00:00",
+        "Domain": {
+            "collections": ["partition_00003"],
+            "total_documents": 300,
+            "partitions": ["partition_00003"],
         },
-    }
+    },
+    "collection_to_models": {
+        "partition_00001": ["Table"],
+        "partition_00002": ["Table", "Field"],
+        "partition_00003": ["Field", "Domain"],
+    },
+    "metadata": {
+        "total_collections": 3,
+        "total_models": 3,
+        "generated_at": "2025-10-31T12:00:00",
+    },
+}
+
+EMPTY_QUERY_CONFIG = {
+    "model_to_collections": {},
+    "collection_to_models": {},
+    "metadata": {"total_models": 0, "total_collections": 0},
+}
+
+MERGE_QUERY_CONFIG = {
+    "model_to_collections": {
+        "Table": {
+            "collections": ["coll1", "coll2"],
+            "total_documents": 100,
+            "partitions": ["p1", "p2"],
+        }
+    },
+    "collection_to_models": {
+        "coll1": ["Table"],
+        "coll2": ["Table"],
+    },
+    "metadata": {"total_models": 1, "total_collections": 2},
+}
+
+# Serialized once at import and served from memory; no test touches the disk.
+QUERY_CONFIG_PATH = Path("in-memory") / "query_config.json"
+EMPTY_QUERY_CONFIG_PATH = Path("in-memory") / "empty_config.json"
+MERGE_QUERY_CONFIG_PATH = Path("in-memory") / "merge_config.json"
+IN_MEMORY_CONFIGS = {
+    QUERY_CONFIG_PATH: _dumps(QUERY_CONFIG),
+    EMPTY_QUERY_CONFIG_PATH: _dumps(EMPTY_QUERY_CONFIG),
+    MERGE_QUERY_CONFIG_PATH: _dumps(MERGE_QUERY_CONFIG),
+}
+
+
+def _load_in_memory_query_config(config_path):
+    """Bytes-backed replacement for ``load_query_config``."""
+    try:
+        payload = IN_MEMORY_CONFIGS[config_path]
+    except KeyError:
+        raise ValueError(f"Query config file {config_path} does not exist") from None
+    return json.loads(payload)
+
+
+@pytest.fixture(autouse=True)
+def _in_memory_query_configs(monkeypatch):
+    """Serve query configs from IN_MEMORY_CONFIGS instead of the filesystem."""
+    monkeypatch.setattr(query_client, "load_query_config", _load_in_memory_query_config)
+
+
+@pytest.fixture
+def query_config_data():
+    """Sample query config data (a private copy tests may mutate)."""
+    return copy.deepcopy(QUERY_CONFIG)
+
+
+@pytest.fixture
+def query_config_file():
+    """Path of the sample query config."""
+    return QUERY_CONFIG_PATH
 
 
 @pytest.fixture
-def query_config_file(query_config_data):
-    """Create a temporary query config file."""
-    with TemporaryDirectory() as tmpdir:
-        config_path = Path(tmpdir) / "query_config.json"
-        config_path.write_text(json.dumps(query_config_data), encoding="utf-8")
-        yield config_path
+def empty_query_config_file():
+    """Path of a query config without any models or collections."""
+    return EMPTY_QUERY_CONFIG_PATH
+
+
+@pytest.fixture
+def merge_query_config_file():
+    """Path of a query config mapping one model onto two collections."""
+    return MERGE_QUERY_CONFIG_PATH
+
+
+# Expected error messages, compiled once for pytest.raises(match=...).
+NOT_CONNECTED_RE = re.compile("not connected")
+MISSING_QUERY_RE = re.compile("query_embeddings or query_texts")
+MISSING_HTTP_HOST_RE = re.compile("http_host is required")
+MISSING_CLOUD_API_KEY_RE = re.compile("cloud_api_key is required")
+UNSUPPORTED_CLIENT_TYPE_RE = re.compile("Unsupported client_type")
+
+# Mock collections return at most this many rows per query/get call.
+MOCK_RESULT_LIMIT = 5
+MOCK_DISTANCES = [0.1 * i for i in range(MOCK_RESULT_LIMIT)]
+
+
+def _mock_rows(name, limit):
+    """Return the (ids, documents, metadatas) rows a mock collection serves."""
+    size = min(limit, MOCK_RESULT_LIMIT)
+    ids = [f"{name}_doc_{i}" for i in range(size)]
+    documents = [f"Document {i} from {name}" for i in range(size)]
+    metadatas = [{"model_name": "Table", "partition_name": name} for _ in range(size)]
+    return ids, documents, metadatas
+
+
+class FakeCollection:
+    """Minimal async stand-in for a ChromaDB collection."""
+
+    document_count = 1000
+
+    def __init__(self, name, query_response=None):
+        self.name = name
+        self.query_response = query_response
+
+    async def query(
+        self,
+        query_embeddings=None,
+        query_texts=None,
+        n_results=10,
+        where=None,
+        where_document=None,
+        include=None,
+    ):
+        if self.query_response is not None:
+            return self.query_response
+        num_queries = len(query_embeddings or query_texts or [])
+        ids, documents, metadatas = _mock_rows(self.name, n_results)
+        # The per-query rows are shared between queries; the client only reads them.
+        return {
+            "ids": [ids] * num_queries,
+            "distances": [MOCK_DISTANCES[: len(ids)]] * num_queries,
+            "documents": [documents] * num_queries,
+            "metadatas": [metadatas] * num_queries,
+            "embeddings": None,
+            "uris": None,
+            "data": None,
+        }
+
+    async def get(
+        self,
+        ids=None,
+        where=None,
+        where_document=None,
+        limit=None,
+        offset=None,
+        include=None,
+    ):
+        row_ids, documents, metadatas = _mock_rows(
+            self.name, limit or MOCK_RESULT_LIMIT
+        )
+        return {
+            "ids": row_ids,
+            "documents": documents,
+            "metadatas": metadatas,
+            "embeddings": None,
+            "uris": None,
+            "data": None,
+        }
+
+    async def count(self):
+        return self.document_count
+
+
+class FakeClient:
+    """Minimal async stand-in for ``chromadb.AsyncClientAPI``."""
+
+    def __init__(self, responses=None, fail_on_call=None):
+        self.collections = {}
+        self.responses = responses or {}
+        self.fail_on_call = fail_on_call
+        self.get_collection_call_count = 0
+
+    async def get_collection(self, name, embedding_function=None):
+        self.get_collection_call_count += 1
+        if self.get_collection_call_count == self.fail_on_call:
+            raise Exception("Connection timeout")
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(name, self.responses.get(name))
+        return self.collections[name]
+
+
+def make_mock_client(responses, fail_on_call=None):
+    """Build a fake client whose collections return canned query payloads.
+
+    ``responses`` maps collection names to the result their ``query`` returns;
+    ``fail_on_call`` makes the n-th ``get_collection`` call raise.
+    """
+    return FakeClient(responses, fail_on_call)
 
 
 @pytest.fixture
 def mock_chroma_client():
-    """Create a mock ChromaDB async client."""
-    client = AsyncMock()
-
-    # Mock collections
-    mock_collections = {}
-
-    async def get_collection_side_effect(name, embedding_function=None):
-        if name not in mock_collections:
-            collection = AsyncMock()
-            collection.name = name
-
-            # Mock query results
-            async def query_side_effect(
-                query_embeddings=None,
-                query_texts=None,
-                n_results=10,
-                where=None,
-                where_document=None,
-                include=None,
-            ):
-                num_queries = len(query_embeddings or query_texts or [])
-                return {
-                    "ids": [
-                        [f"{name}_doc_{i}" for i in range(min(n_results, 5))]
-                        for _ in range(num_queries)
-                    ],
-                    "distances": [
-                        [0.1 * i for i in range(min(n_results, 5))]
-                        for _ in range(num_queries)
-                    ],
-                    "documents": [
-                        [f"Document {i} from {name}" for i in range(min(n_results, 5))]
-                        for _ in range(num_queries)
-                    ],
-                    "metadatas": [
-                        [
-                            {"model_name": "Table", "partition_name": name}
-                            for i in range(min(n_results, 5))
-                        ]
-                        for _ in range(num_queries)
-                    ],
-                    "embeddings": None,
-                    "uris": None,
-                    "data": None,
-                }
-
-            collection.query = AsyncMock(side_effect=query_side_effect)
-
-            # Mock get results
-            async def get_side_effect(
-                ids=None,
-                where=None,
-                where_document=None,
-                limit=None,
-                offset=None,
-                include=None,
-            ):
-                return {
-                    "ids": [f"{name}_doc_{i}" for i in range(min(limit or 5, 5))],
-                    "documents": [
-                        f"Document {i} from {name}" for i in range(min(limit or 5, 5))
-                    ],
-                    "metadatas": [
-                        {"model_name": "Table", "partition_name": name}
-                        for i in range(min(limit or 5, 5))
-                    ],
-                    "embeddings": None,
-                    "uris": None,
-                    "data": None,
-                }
-
-            collection.get = AsyncMock(side_effect=get_side_effect)
-
-            # Mock count
-            collection.count = AsyncMock(return_value=1000)
-
-            mock_collections[name] = collection
-
-        return mock_collections[name]
-
-    client.get_collection = AsyncMock(side_effect=get_collection_side_effect)
-
-    return client
+    """Create a fake ChromaDB async client."""
+    return FakeClient()
+
+
+def _async_factory(client):
+    """Return an awaitable stand-in for ``chromadb.AsyncHttpClient``."""
+
+    async def factory(*args, **kwargs):
+        return client
+
+    return factory
+
+
+@pytest.fixture(autouse=True)
+def _patch_chroma(monkeypatch, mock_chroma_client):
+    """Route every ``chromadb.AsyncHttpClient`` call to the mock client."""
+    monkeypatch.setattr(chromadb, "AsyncHttpClient", _async_factory(mock_chroma_client))
+
+
+@pytest_asyncio.fixture
+async def connected_client(query_config_file):
+    """Client already connected to the mock ChromaDB server."""
+    async with AsyncMultiCollectionQueryClient(
+        config_path=query_config_file,
+        client_type="http",
+        http_host="localhost",
+    ) as client:
+        yield client
 
 
 @pytest.mark.asyncio
@@ -160,146 +285,98 @@ async def test_client_initialization(query_config_file):
 @pytest.mark.asyncio
 async def test_client_connect_loads_config(query_config_file, mock_chroma_client):
     """Test that connect() loads the query config."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        client = AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        )
+    client = AsyncMultiCollectionQueryClient(
+        config_path=query_config_file,
+        client_type="http",
+        http_host="localhost",
+    )
 
-        await client.connect()
+    await client.connect()
 
-        assert client._query_config is not None
-        assert client._query_config["metadata"]["total_models"] == 3
-        assert client._query_config["metadata"]["total_collections"] == 3
+    assert client._query_config is not None
+    assert client._query_config["metadata"]["total_models"] == 3
+    assert client._query_config["metadata"]["total_collections"] == 3
 
-        await client.close()
+    await client.close()
 
 
 @pytest.mark.asyncio
 async def test_client_context_manager(query_config_file, mock_chroma_client):
     """Test using client as async context manager."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            assert client._client is not None
-            assert client._query_config is not None
-
-
-@pytest.mark.asyncio
-async def test_query_specific_models(query_config_file, mock_chroma_client):
-    """Test querying specific models."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            results = await client.query(
-                query_texts=["test query"],
-                n_results=5,
-                models=["Table"],
-            )
-
-            # Should query partition_00001 and partition_00002
-            assert mock_chroma_client.get_collection.call_count >= 2
-
-            # Check result structure
-            assert "ids" in results
-            assert "distances" in results
-            assert "documents" in results
-            assert "metadatas" in results
-            assert len(results["ids"]) == 1  # One query
-            assert len(results["ids"][0]) <= 5  # Up to 5 results
-
-
-@pytest.mark.asyncio
-async def test_query_all_models(query_config_file, mock_chroma_client):
-    """Test querying all models (models=None)."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            results = await client.query(
-                query_texts=["test query"],
-                n_results=10,
-                models=None,  # All collections
-            )
-
-            # Should query all 3 collections
-            assert mock_chroma_client.get_collection.call_count >= 3
-
-            assert "ids" in results
-            assert len(results["ids"]) == 1
-
-
-@pytest.mark.asyncio
-async def test_query_multiple_queries(query_config_file, mock_chroma_client):
-    """Test querying with multiple query texts."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            query_texts = ["query 1", "query 2", "query 3"]
-            results = await client.query(
-                query_texts=query_texts,
-                n_results=5,
-                models=["Field"],
-            )
-
-            # Should have results for each query
-            assert len(results["ids"]) == 3
-            assert len(results["distances"]) == 3
-            assert len(results["documents"]) == 3
-            assert len(results["metadatas"]) == 3
+    async with AsyncMultiCollectionQueryClient(
+        config_path=query_config_file,
+        client_type="http",
+        http_host="localhost",
+    ) as client:
+        assert client._client is not None
+        assert client._query_config is not None
 
 
 @pytest.mark.asyncio
-async def test_query_with_metadata_filter(query_config_file, mock_chroma_client):
-    """Test querying with metadata filters."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            results = await client.query(
-                query_texts=["test"],
-                n_results=5,
-                models=["Table"],
-                where={"has_sem": True},
-            )
-
-            assert "ids" in results
-            # Verify where parameter was passed to collection.query
-            # (would need to check mock call args in more detailed test)
-
+@pytest.mark.parametrize(
+    "kwargs, expected_collections, expected_queries, expected_hits",
+    [
+        pytest.param(
+            {"query_texts": ["test query"], "n_results": 5, "models": ["Table"]},
+            2,  # partition_00001 and partition_00002
+            1,
+            5,
+            id="specific-models",
+        ),
+        pytest.param(
+            {"query_texts": ["test query"], "n_results": 10, "models": None},
+            3,  # models=None fans out to every collection
+            1,
+            10,
+            id="all-models",
+        ),
+        pytest.param(
+            {
+                "query_texts": ["query 1", "query 2", "query 3"],
+                "n_results": 5,
+                "models": ["Field"],
+            },
+            2,
+            3,
+            5,
+            id="multiple-queries",
+        ),
+        pytest.param(
+            {
+                "query_texts": ["test"],
+                "n_results": 5,
+                "models": ["Table"],
+                "where": {"has_sem": True},
+            },
+            2,
+            1,
+            5,
+            id="metadata-filter",
+        ),
+        pytest.param(
+            {"query_texts": ["test"], "n_results": 5, "models": ["UnknownModel"]},
+            0,  # unknown models resolve to no collections
+            1,
+            0,
+            id="unknown-model",
+        ),
+    ],
+)
+async def test_query_variants(
+    connected_client,
+    mock_chroma_client,
+    kwargs,
+    expected_collections,
+    expected_queries,
+    expected_hits,
+):
+    """Test query fan-out and merged result shape for different arguments."""
+    results = await connected_client.query(**kwargs)
 
-@pytest.mark.asyncio
-async def test_query_unknown_model(query_config_file, mock_chroma_client):
-    """Test querying unknown model returns empty results."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            results = await client.query(
-                query_texts=["test"],
-                n_results=5,
-                models=["UnknownModel"],
-            )
-
-            # Should return empty results
-            assert results["ids"] == [[]]
-            assert results["distances"] == [[]]
+    assert mock_chroma_client.get_collection_call_count == expected_collections
+    for key in ("ids", "distances", "documents", "metadatas"):
+        assert len(results[key]) == expected_queries
+        assert all(len(row) == expected_hits for row in results[key])
 
 
 @pytest.mark.asyncio
@@ -311,135 +388,100 @@ async def test_query_without_connect_raises(query_config_file):
         http_host="localhost",
     )
 
-    with pytest.raises(RuntimeError, match="not connected"):
+    with pytest.raises(RuntimeError, match=NOT_CONNECTED_RE):
         await client.query(query_texts=["test"], n_results=5)
 
 
 @pytest.mark.asyncio
 async def test_query_without_query_texts_or_embeddings_raises(
-    query_config_file, mock_chroma_client
+    connected_client, mock_chroma_client
 ):
     """Test that query without texts or embeddings raises error."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            with pytest.raises(ValueError, match="query_embeddings or query_texts"):
-                await client.query(n_results=5)
+    with pytest.raises(ValueError, match=MISSING_QUERY_RE):
+        await connected_client.query(n_results=5)
 
 
 @pytest.mark.asyncio
-async def test_get_documents(query_config_file, mock_chroma_client):
-    """Test getting documents by ID or filter."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            docs = await client.get(
-                where={"model_name": "Table"},
-                limit=10,
-                models=["Table"],
-            )
-
-            assert "ids" in docs
-            assert "documents" in docs
-            assert "metadatas" in docs
-            assert isinstance(docs["ids"], list)
-
+@pytest.mark.parametrize(
+    "kwargs, expected_collections, expected_ids",
+    [
+        pytest.param(
+            {"where": {"model_name": "Table"}, "limit": 10, "models": ["Table"]},
+            2,
+            10,
+            id="filtered",
+        ),
+        pytest.param(
+            {"models": ["UnknownModel"], "limit": 10},
+            0,
+            0,
+            id="unknown-model",
+        ),
+    ],
+)
+async def test_get_variants(
+    connected_client, mock_chroma_client, kwargs, expected_collections, expected_ids
+):
+    """Test getting documents by ID or filter across collections."""
+    docs = await connected_client.get(**kwargs)
 
-@pytest.mark.asyncio
-async def test_get_unknown_model(query_config_file, mock_chroma_client):
-    """Test getting documents for unknown model."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            docs = await client.get(
-                models=["UnknownModel"],
-                limit=10,
-            )
-
-            # Should return empty
-            assert docs["ids"] == []
+    assert mock_chroma_client.get_collection_call_count == expected_collections
+    assert "documents" in docs
+    assert "metadatas" in docs
+    assert isinstance(docs["ids"], list)
+    assert len(docs["ids"]) == expected_ids
 
 
 @pytest.mark.asyncio
-async def test_count_documents(query_config_file, mock_chroma_client):
+async def test_count_documents(connected_client, mock_chroma_client):
     """Test counting documents."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            # Count specific model
-            count = await client.count(models=["Table"])
-            assert count > 0  # Should be 2000 (1000 per collection)
+    # Count specific model
+    count = await connected_client.count(models=["Table"])
+    assert count == 2 * FakeCollection.document_count  # 1000 per collection
 
-            # Count all
-            total_count = await client.count(models=None)
-            assert total_count > 0  # Should be 3000
+    # Count all
+    total_count = await connected_client.count(models=None)
+    assert total_count == 3 * FakeCollection.document_count
 
 
 @pytest.mark.asyncio
-async def test_collection_caching(query_config_file, mock_chroma_client):
+async def test_collection_caching(connected_client, mock_chroma_client):
     """Test that collections are cached after first retrieval."""
-    with patch("chromadb.AsyncHttpClient", return_value=mock_chroma_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            # First query
-            await client.query(
-                query_texts=["test"],
-                n_results=5,
-                models=["Table"],
-            )
-
-            first_call_count = mock_chroma_client.get_collection.call_count
-
-            # Second query - should use cached collections
-            await client.query(
-                query_texts=["test 2"],
-                n_results=5,
-                models=["Table"],
-            )
-
-            # Should not have called get_collection again
-            assert mock_chroma_client.get_collection.call_count == first_call_count
+    # First query
+    await connected_client.query(
+        query_texts=["test"],
+        n_results=5,
+        models=["Table"],
+    )
+
+    first_call_count = mock_chroma_client.get_collection_call_count
+
+    # Second query - should use cached collections
+    await connected_client.query(
+        query_texts=["test 2"],
+        n_results=5,
+        models=["Table"],
+    )
+
+    # Should not have called get_collection again
+    assert mock_chroma_client.get_collection_call_count == first_call_count
 
 
 @pytest.mark.asyncio
-async def test_client_initialization_cloud():
+async def test_client_initialization_cloud(empty_query_config_file):
     """Test client initialization for cloud."""
-    with TemporaryDirectory() as tmpdir:
-        config_path = Path(tmpdir) / "config.json"
-        config_data = {
-            "model_to_collections": {},
-            "collection_to_models": {},
-            "metadata": {"total_models": 0, "total_collections": 0},
-        }
-        config_path.write_text(json.dumps(config_data))
-
-        client = AsyncMultiCollectionQueryClient(
-            config_path=config_path,
-            client_type="cloud",
-            cloud_api_key="test_key",
-            cloud_tenant="test_tenant",
-            cloud_database="test_db",
-        )
+    client = AsyncMultiCollectionQueryClient(
+        config_path=empty_query_config_file,
+        client_type="cloud",
+        cloud_api_key="test_key",
+        cloud_tenant="test_tenant",
+        cloud_database="test_db",
+    )
 
-        assert client.client_type == "cloud"
-        assert client.cloud_api_key == "test_key"
-        assert client.cloud_tenant == "test_tenant"
-        assert client.cloud_database == "test_db"
+    assert client.client_type == "cloud"
+    assert client.cloud_api_key == "test_key"
+    assert client.cloud_tenant == "test_tenant"
+    assert client.cloud_database == "test_db"
 
 
 @pytest.mark.asyncio
@@ -451,7 +493,7 @@ async def test_client_http_without_host_raises(query_config_file):
         http_host=None,  # Missing required host
     )
 
-    with pytest.raises(ValueError, match="http_host is required"):
+    with pytest.raises(ValueError, match=MISSING_HTTP_HOST_RE):
         await client.connect()
 
 
@@ -464,7 +506,7 @@ async def test_client_cloud_without_api_key_raises(query_config_file):
         cloud_api_key=None,  # Missing required API key
     )
 
-    with pytest.raises(ValueError, match="cloud_api_key is required"):
+    with pytest.raises(ValueError, match=MISSING_CLOUD_API_KEY_RE):
         await client.connect()
 
 
@@ -476,122 +518,79 @@ async def test_client_invalid_type_raises(query_config_file):
         client_type="invalid",
     )
 
-    with pytest.raises(ValueError, match="Unsupported client_type"):
+    with pytest.raises(ValueError, match=UNSUPPORTED_CLIENT_TYPE_RE):
         await client.connect()
 
 
 @pytest.mark.asyncio
-async def test_merge_results_sorting():
+async def test_merge_results_sorting(merge_query_config_file, monkeypatch):
     """Test that results are properly merged and sorted by distance."""
-    with TemporaryDirectory() as tmpdir:
-        config_path = Path(tmpdir) / "config.json"
-        config_data = {
-            "model_to_collections": {
-                "Table": {
-                    "collections": ["coll1", "coll2"],
-                    "total_documents": 100,
-                    "partitions": ["p1", "p2"],
-                }
+    mock_client = make_mock_client(
+        {
+            "coll1": {
+                "ids": [["coll1_doc1", "coll1_doc2"]],
+                "distances": [[0.5, 0.7]],
+                "documents": [["doc1", "doc2"]],
+                "metadatas": [[{"m": 1}, {"m": 2}]],
             },
-            "collection_to_models": {
-                "coll1": ["Table"],
-                "coll2": ["Table"],
+            "coll2": {
+                "ids": [["coll2_doc1", "coll2_doc2"]],
+                "distances": [[0.3, 0.6]],  # Better scores
+                "documents": [["doc3", "doc4"]],
+                "metadatas": [[{"m": 3}, {"m": 4}]],
             },
-            "metadata": {"total_models": 1, "total_collections": 2},
         }
-        config_path.write_text(json.dumps(config_data))
-
-        # Create mock client that returns different distances
-        mock_client = AsyncMock()
-
-        async def get_coll_side_effect(name, embedding_function=None):
-            coll = AsyncMock()
-            coll.name = name
-
-            async def query_side_effect(*args, **kwargs):
-                if name == "coll1":
-                    return {
-                        "ids": [["coll1_doc1", "coll1_doc2"]],
-                        "distances": [[0.5, 0.7]],
-                        "documents": [["doc1", "doc2"]],
-                        "metadatas": [[{"m": 1}, {"m": 2}]],
-                    }
-                else:  # coll2
-                    return {
-                        "ids": [["coll2_doc1", "coll2_doc2"]],
-                        "distances": [[0.3, 0.6]],  # Better scores
-                        "documents": [["doc3", "doc4"]],
-                        "metadatas": [[{"m": 3}, {"m": 4}]],
-                    }
-
-            coll.query = AsyncMock(side_effect=query_side_effect)
-            return coll
-
-        mock_client.get_collection = AsyncMock(side_effect=get_coll_side_effect)
-
-        with patch("chromadb.AsyncHttpClient", return_value=mock_client):
-            async with AsyncMultiCollectionQueryClient(
-                config_path=config_path,
-                client_type="http",
-                http_host="localhost",
-            ) as client:
-                results = await client.query(
-                    query_texts=["test"],
-                    n_results=3,
-                    models=["Table"],
-                )
-
-                # Check that results are sorted by distance
-                distances = results["distances"][0]
-                assert distances == sorted(distances)
-
-                # Best result should be from coll2 (distance 0.3)
-                assert results["ids"][0][0] == "coll2_doc1"
-                assert results["distances"][0][0] == 0.3
-
-
-@pytest.mark.asyncio
-async def test_partial_failure_handling(query_config_file):
-    """Test that partial collection failures are handled gracefully."""
-    mock_client = AsyncMock()
+    )
+    monkeypatch.setattr(chromadb, "AsyncHttpClient", _async_factory(mock_client))
 
-    call_count = 0
+    async with AsyncMultiCollectionQueryClient(
+        config_path=merge_query_config_file,
+        client_type="http",
+        http_host="localhost",
+    ) as client:
+        results = await client.query(
+            query_texts=["test"],
+            n_results=3,
+            models=["Table"],
+        )
 
-    async def get_coll_side_effect(name, embedding_function=None):
-        nonlocal call_count
-        call_count += 1
+    # Check that results are sorted by distance
+    distances = results["distances"][0]
+    assert distances == sorted(distances)
 
-        if call_count == 2:  # Second collection fails
-            raise Exception("Connection timeout")
+    # Best result should be from coll2 (distance 0.3)
+    assert results["ids"][0][0] == "coll2_doc1"
+    assert results["distances"][0][0] == 0.3
 
-        coll = AsyncMock()
-        coll.name = name
 
-        async def query_side_effect(*args, **kwargs):
-            return {
+@pytest.mark.asyncio
+async def test_partial_failure_handling(query_config_file, monkeypatch):
+    """Test that partial collection failures are handled gracefully."""
+    mock_client = make_mock_client(
+        {
+            name: {
                 "ids": [[f"{name}_doc"]],
                 "distances": [[0.5]],
                 "documents": [["doc"]],
                 "metadatas": [[{"m": 1}]],
             }
+            for name in ("partition_00001", "partition_00002")
+        },
+        fail_on_call=2,  # Second collection fails
+    )
+    monkeypatch.setattr(chromadb, "AsyncHttpClient", _async_factory(mock_client))
+
+    async with AsyncMultiCollectionQueryClient(
+        config_path=query_config_file,
+        client_type="http",
+        http_host="localhost",
+    ) as client:
+        # Should not raise, just log warning
+        results = await client.query(
+            query_texts=["test"],
+            n_results=5,
+            models=["Table"],  # Queries 2 collections
+        )
 
-        coll.query = AsyncMock(side_effect=query_side_effect)
-        return coll
-
-    mock_client.get_collection = AsyncMock(side_effect=get_coll_side_effect)
-
-    with patch("chromadb.AsyncHttpClient", return_value=mock_client):
-        async with AsyncMultiCollectionQueryClient(
-            config_path=query_config_file,
-            client_type="http",
-            http_host="localhost",
-        ) as client:
-            # Should not raise, just log warning
-            results = await client.query(
-                query_texts=["test"],
-                n_results=5,
-                models=["Table"],  # Queries 2 collections
-            )
-
-            # Should have results from successful collection(s)
-            assert len(results["ids"][0]) > 0
+    # Should have results from successful collection(s)
+    assert len(results["ids"][0]) > 0
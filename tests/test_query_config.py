@@ -365,3 +365,54 @@ def test_generate_query_config_file_instead_of_dir(temp_partition_dir):
 
     with pytest.raises(ValueError, match="not a directory"):
         generate_query_config(file_path)
+
+
+def test_generate_query_config_reuses_cache(populated_partition_dir, monkeypatch):
+    """Test that unchanged resume state files are served from the cache."""
+    from indexer.vectorize_lib import query_config
+
+    first = generate_query_config(populated_partition_dir)
+    assert (populated_partition_dir / query_config.QUERY_CONFIG_CACHE_NAME).exists()
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("resume state files should not be re-read")
+
+    monkeypatch.setattr(query_config, "_aggregate_query_config", _fail)
+    monkeypatch.setattr(query_config, "_generated_at", lambda: "2099-01-01T00:00:00")
+    output_path = populated_partition_dir / "query_config.json"
+
+    second = generate_query_config(populated_partition_dir, output_path=output_path)
+
+    assert second["metadata"]["generated_at"] == "2099-01-01T00:00:00"
+    assert load_query_config(output_path)["metadata"]["generated_at"] == (
+        "2099-01-01T00:00:00"
+    )
+    second["metadata"]["generated_at"] = first["metadata"]["generated_at"]
+    assert second == first
+
+
+def test_generate_query_config_cache_invalidated_on_change(populated_partition_dir):
+    """Test that modifying a resume state file refreshes the cached config."""
+    generate_query_config(populated_partition_dir)
+
+    resume_file = (
+        populated_partition_dir
+        / "partition_00003"
+        / "partition_00003_resume_state.json"
+    )
+    resume_file.write_text(
+        json.dumps({"NewModel": {"started": True, "collection_count": 42}}),
+        encoding="utf-8",
+    )
+
+    config = generate_query_config(populated_partition_dir)
+    assert config["model_to_collections"]["NewModel"]["total_documents"] == 42
+
+
+def test_generate_query_config_without_cache(populated_partition_dir):
+    """Test that use_cache=False neither reads nor writes the cache file."""
+    from indexer.vectorize_lib.query_config import QUERY_CONFIG_CACHE_NAME
+
+    generate_query_config(populated_partition_dir, use_cache=False)
+
+    assert not (populated_partition_dir / QUERY_CONFIG_CACHE_NAME).exists()
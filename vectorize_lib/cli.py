@@ -3,8 +3,10 @@
 from __future__ import annotations
 from .validation import validate_config_sources
 from .utils import (
+    extract_retry_after_seconds,
     format_int,
     get_token_encoder,
+    iter_exception_chain,
     load_completion_state,
     summarize_collection,
     TOKEN_SAFETY_LIMIT,
@@ -75,54 +77,16 @@ def _coerce_optional_int(value: Any) -> Optional[int]:
     return None
 
 
-def _iter_exception_chain(error: BaseException):
-    """Yield an exception and its chained causes/contexts exactly once."""
-    seen: set[int] = set()
-    stack = [error]
-    while stack:
-        current = stack.pop()
-        if not isinstance(current, BaseException):
-            continue
-        identity = id(current)
-        if identity in seen:
-            continue
-        seen.add(identity)
-        yield current
-        cause = getattr(current, "__cause__", None)
-        context = getattr(current, "__context__", None)
-        if isinstance(cause, BaseException):
-            stack.append(cause)
-        if isinstance(context, BaseException):
-            stack.append(context)
-
-
 def _is_rate_limit_error(exc: BaseException) -> bool:
     """Return True when the exception chain includes an OpenAI rate limit error."""
     if not _RATE_LIMIT_ERROR_TYPES:
         return False
     return any(
         isinstance(candidate, _RATE_LIMIT_ERROR_TYPES)
-        for candidate in _iter_exception_chain(exc)
+        for candidate in iter_exception_chain(exc)
     )
 
 
-def _extract_retry_after_seconds(exc: BaseException) -> Optional[float]:
-    """Extract the suggested retry delay (in seconds) if present."""
-    for candidate in _iter_exception_chain(exc):
-        retry_after = getattr(candidate, "retry_after", None)
-        if isinstance(retry_after, (int, float)):
-            return float(retry_after)
-        error_payload = getattr(candidate, "error", None)
-        if isinstance(error_payload, Mapping):
-            direct = error_payload.get("retry_after")
-            if isinstance(direct, (int, float)):
-                return float(direct)
-            retry_ms = error_payload.get("retry_after_ms")
-            if isinstance(retry_ms, (int, float)):
-                return float(retry_ms) / 1000.0
-    return None
-
-
 CLI_DESCRIPTION = textwrap.dedent(
     """
     Build and maintain a persistent ChromaDB index for SAP ECC 6.0 knowledge-base CSV exports.
@@ -1678,7 +1642,7 @@ class VectorizeCLI:
                 )
             except Exception as exc:
                 if _is_rate_limit_error(exc):
-                    retry_after = _extract_retry_after_seconds(exc)
+                    retry_after = extract_retry_after_seconds(exc)
                     with rate_limit_lock:
                         rate_limited_partitions.append(entry)
                         attempts = rate_limit_attempts.get(partition_name, 0) + 1
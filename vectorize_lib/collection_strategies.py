@@ -1,8 +1,13 @@
 """Collection naming strategies for vectorize CLI."""
 
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Protocol
 
+# ``slots=True`` needs Python 3.10+; older interpreters keep a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class CollectionStrategy(Protocol):
     """Protocol for resolving Chroma collection names."""
@@ -12,7 +17,7 @@ class CollectionStrategy(Protocol):
         ...
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class FixedCollectionStrategy:
     """Always return the same collection name."""
 
@@ -22,19 +27,31 @@ class FixedCollectionStrategy:
         return self.name
 
 
-@dataclass(frozen=True)
+@lru_cache(maxsize=4096)
+def _partition_collection_name(
+    prefix: Optional[str], partition_name: Optional[str]
+) -> str:
+    """Build (and memoize) a partition-scoped collection name.
+
+    The same few partition names are resolved once per batch, so caching
+    returns the same string object instead of formatting a new one each time.
+    """
+    if partition_name is None:
+        if prefix is not None:
+            return prefix
+        raise ValueError(
+            "Partition-scoped collection strategy requires a partition name."
+        )
+    if prefix:
+        return f"{prefix}_{partition_name}"
+    return partition_name
+
+
+@dataclass(frozen=True, **_SLOTS)
 class PartitionCollectionStrategy:
     """Derive collection names from partition identifiers."""
 
     prefix: Optional[str] = None
 
     def collection_name(self, partition_name: Optional[str]) -> str:
-        if partition_name is None:
-            if self.prefix is not None:
-                return self.prefix
-            raise ValueError(
-                "Partition-scoped collection strategy requires a partition name."
-            )
-        if self.prefix:
-            return f"{self.prefix}_{partition_name}"
-        return partition_name
+        return _partition_collection_name(self.prefix, partition_name)
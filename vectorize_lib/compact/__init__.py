@@ -2,6 +2,7 @@
 
 from .document_compactor import (
     CHROMA_DOCUMENT_SIZE_LIMIT,
+    DEFAULT_COMPACTION_CONCURRENCY,
     CompactionResult,
     DocumentCompactor,
 )
@@ -9,5 +10,6 @@ from .document_compactor import (
 __all__ = [
     "CHROMA_DOCUMENT_SIZE_LIMIT",
     "CompactionResult",
+    "DEFAULT_COMPACTION_CONCURRENCY",
     "DocumentCompactor",
 ]
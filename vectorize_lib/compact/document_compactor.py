@@ -2,16 +2,60 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Protocol, Sequence, cast
-
-from openai import APIError, OpenAI, OpenAIError
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
+
+logger = logging.getLogger(__name__)
 
 CHROMA_DOCUMENT_SIZE_LIMIT = 16_384
 
+# UTF-8 never spends more than this many bytes on a single code point.
+MAX_UTF8_BYTES_PER_CHAR = 4
+
+# Default number of in-flight OpenAI requests for ``compact_many``.
+DEFAULT_COMPACTION_CONCURRENCY = 16
+
+_SOURCE_DOCUMENT_OPEN = "\n----- BEGIN SOURCE DOCUMENT -----\n"
+_SOURCE_DOCUMENT_CLOSE = "\n----- END SOURCE DOCUMENT -----"
+_COMPACTION_TOOLS: List[Dict[str, Any]] = [
+    {"type": "code_interpreter", "container": {"type": "auto"}}
+]
+
+# ``slots=True`` needs Python 3.10+; older interpreters keep a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@lru_cache(maxsize=None)
+def _recoverable_errors() -> Tuple[Type[BaseException], ...]:
+    """Return the exceptions that fall back to deterministic trimming.
+
+    ``openai`` pulls in httpx and pydantic, so it is imported on first use
+    rather than when the module loads. ``except`` clauses only evaluate this
+    once an exception is already in flight.
+    """
+    from openai import APIError, OpenAIError
+
+    return (APIError, OpenAIError, OSError)
+
 
 class _ResponsesClient(Protocol):
     """Protocol covering the subset of the OpenAI client we rely on."""
@@ -33,7 +77,20 @@ class _OpenAIClient(Protocol):
     def responses(self) -> _ResponsesClient: ...
 
 
-@dataclass
+class _AsyncResponsesClient(Protocol):
+    """Async counterpart of :class:`_ResponsesClient`."""
+
+    def create(self, **kwargs: object) -> Awaitable["_ResponseProtocol"]: ...
+
+
+class _AsyncOpenAIClient(Protocol):
+    """Protocol abstraction for the async OpenAI client."""
+
+    @property
+    def responses(self) -> _AsyncResponsesClient: ...
+
+
+@dataclass(**_SLOTS)
 class CompactionResult:
     """Container for the outcome of an LLM compaction attempt."""
 
@@ -48,6 +105,7 @@ class DocumentCompactor:
         self,
         *,
         client: Optional[_OpenAIClient] = None,
+        async_client: Optional[_AsyncOpenAIClient] = None,
         prompt_path: Optional[Path] = None,
         model: Optional[str] = None,
         target_bytes: int = CHROMA_DOCUMENT_SIZE_LIMIT,
@@ -56,7 +114,12 @@ class DocumentCompactor:
         system_prompt_path = prompt_path or Path(__file__).with_name(
             "compact-prompt.md"
         )
-        self._system_prompt = system_prompt_path.read_text(encoding="utf-8").strip()
+        self._system_prompt = system_prompt_path.read_bytes().strip().decode("utf-8")
+        # The system message never changes, so build it once per compactor.
+        self._system_message: Dict[str, Any] = {
+            "role": "system",
+            "content": [{"type": "input_text", "text": self._system_prompt}],
+        }
 
         api_key = os.getenv("OPENAI_API_KEY")
         if client is None:
@@ -64,8 +127,12 @@ class DocumentCompactor:
                 raise RuntimeError(
                     "OPENAI_API_KEY environment variable is required for document compaction."
                 )
+            from openai import OpenAI
+
             client = cast(_OpenAIClient, OpenAI(api_key=api_key))
         self._client: _OpenAIClient = client
+        # Created lazily by ``compact_many`` so sync-only callers never pay for it.
+        self._async_client: Optional[_AsyncOpenAIClient] = async_client
 
         resolved_model = model or os.getenv("OPENAI_MODEL")
         if not resolved_model:
@@ -93,85 +160,218 @@ class DocumentCompactor:
         Returns the compacted text and whether the document was modified.
         If the LLM call fails, falls back to deterministic trimming.
         """
-        budget = max(1, target_bytes or self._target_bytes)
-        original_bytes = len(text.encode("utf-8"))
-        if original_bytes <= budget:
-            return CompactionResult(text=text, was_compacted=False)
+        prepared = self._prepare(
+            doc_id=doc_id,
+            text=text,
+            model_name=model_name,
+            target_bytes=target_bytes,
+            extra_context=extra_context,
+        )
+        if isinstance(prepared, CompactionResult):
+            return prepared
+        budget, original_encoded, request = prepared
 
-        payload_sections = [
-            f"target_characters={budget}",
-            f"document_id={doc_id}",
-        ]
-        if model_name:
-            payload_sections.append(f"model_name={model_name}")
-        if extra_context:
-            payload_sections.extend(extra_context)
+        compacted_text: Optional[str] = None
+        try:
+            response = self._client.responses.create(**request)
+            compacted_text = response.output_text.strip()
+        except _recoverable_errors() as exc:
+            self._log_failure(doc_id, exc)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception(
+                "Unexpected error while compacting document %s: %s", doc_id, exc
+            )
 
-        payload_sections.append("----- BEGIN SOURCE DOCUMENT -----")
-        payload_sections.append(text)
-        payload_sections.append("----- END SOURCE DOCUMENT -----")
+        return self._finalize(doc_id, text, budget, original_encoded, compacted_text)
 
-        user_content = "\n".join(payload_sections)
+    async def compact_many(
+        self,
+        requests: Sequence[Mapping[str, Any]],
+        *,
+        concurrency: int = DEFAULT_COMPACTION_CONCURRENCY,
+    ) -> List[CompactionResult]:
+        """Compact many documents concurrently through the async OpenAI client.
+
+        Args:
+            requests: Keyword arguments for :meth:`compact`, one mapping per
+                document (``doc_id`` and ``text`` are required).
+            concurrency: Maximum number of OpenAI requests in flight.
+
+        Returns:
+            Compaction results in the same order as ``requests``.
+
+        Sync callers can use ``asyncio.run(compactor.compact_many(...))``.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _bounded(kwargs: Mapping[str, Any]) -> CompactionResult:
+            async with semaphore:
+                return await self._compact_async(**kwargs)
+
+        return list(await asyncio.gather(*(_bounded(r) for r in requests)))
+
+    async def _compact_async(
+        self,
+        *,
+        doc_id: str,
+        text: str,
+        model_name: Optional[str] = None,
+        target_bytes: Optional[int] = None,
+        extra_context: Optional[Sequence[str]] = None,
+    ) -> CompactionResult:
+        """Async variant of :meth:`compact` used by :meth:`compact_many`."""
+        prepared = self._prepare(
+            doc_id=doc_id,
+            text=text,
+            model_name=model_name,
+            target_bytes=target_bytes,
+            extra_context=extra_context,
+        )
+        if isinstance(prepared, CompactionResult):
+            return prepared
+        budget, original_encoded, request = prepared
 
         compacted_text: Optional[str] = None
         try:
-            response = self._client.responses.create(
-                model=self._model,
-                input=[
-                    {
-                        "role": "system",
-                        "content": [
-                            {"type": "input_text", "text": self._system_prompt}
-                        ],
-                    },
-                    {
-                        "role": "user",
-                        "content": [{"type": "input_text", "text": user_content}],
-                    },
-                ],
-                tools=[
-                    {
-                        "type": "code_interpreter",
-                        "container": {"type": "auto"},
-                    }
-                ],
-            )
+            response = await self._get_async_client().responses.create(**request)
             compacted_text = response.output_text.strip()
-        except (APIError, OpenAIError, OSError) as exc:
-            logging.error(
-                "Failed to compact document %s with OpenAI model %s: %s",
-                doc_id,
-                self._model,
-                exc,
-            )
+        except _recoverable_errors() as exc:
+            self._log_failure(doc_id, exc)
         except Exception as exc:  # pragma: no cover - defensive logging
-            logging.exception(
+            logger.exception(
                 "Unexpected error while compacting document %s: %s", doc_id, exc
             )
 
+        return self._finalize(doc_id, text, budget, original_encoded, compacted_text)
+
+    def _get_async_client(self) -> _AsyncOpenAIClient:
+        """Return the async client, creating it on first use."""
+        if self._async_client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError(
+                    "OPENAI_API_KEY environment variable is required for document compaction."
+                )
+            from openai import AsyncOpenAI
+
+            self._async_client = cast(_AsyncOpenAIClient, AsyncOpenAI(api_key=api_key))
+        return self._async_client
+
+    def _prepare(
+        self,
+        *,
+        doc_id: str,
+        text: str,
+        model_name: Optional[str],
+        target_bytes: Optional[int],
+        extra_context: Optional[Sequence[str]],
+    ) -> Union[CompactionResult, Tuple[int, bytes, Dict[str, Any]]]:
+        """Short-circuit documents within budget, else build the request kwargs.
+
+        Returns a :class:`CompactionResult` when no LLM call is needed, or a
+        ``(budget, original_encoded, request_kwargs)`` tuple otherwise.
+        """
+        budget = max(1, target_bytes or self._target_bytes)
+        if len(text) * MAX_UTF8_BYTES_PER_CHAR <= budget:
+            # Fits even if every character needs four bytes; skip the encode.
+            return CompactionResult(text=text, was_compacted=False)
+        original_encoded = text.encode("utf-8")
+        if len(original_encoded) <= budget:
+            return CompactionResult(text=text, was_compacted=False)
+
+        header = f"target_characters={budget}\ndocument_id={doc_id}"
+        if model_name:
+            header += f"\nmodel_name={model_name}"
+        if extra_context:
+            header += "\n" + "\n".join(extra_context)
+
+        request: Dict[str, Any] = {
+            "model": self._model,
+            "input": [
+                self._system_message,
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "input_text",
+                            "text": header
+                            + _SOURCE_DOCUMENT_OPEN
+                            + text
+                            + _SOURCE_DOCUMENT_CLOSE,
+                        }
+                    ],
+                },
+            ],
+            "tools": _COMPACTION_TOOLS,
+        }
+        return budget, original_encoded, request
+
+    def _finalize(
+        self,
+        doc_id: str,
+        text: str,
+        budget: int,
+        original_encoded: bytes,
+        compacted_text: Optional[str],
+    ) -> CompactionResult:
+        """Apply the hard byte budget to the LLM output and build the result."""
         if not compacted_text:
             compacted_text = text
+            compacted_encoded = original_encoded
+        else:
+            compacted_encoded = compacted_text.encode("utf-8")
 
-        normalized = self._enforce_budget(compacted_text, budget)
+        normalized = self._enforce_budget(compacted_text, budget, compacted_encoded)
         was_compacted = normalized != text
 
-        if was_compacted:
-            logging.info(
+        if was_compacted and logger.isEnabledFor(logging.INFO):
+            # Re-encoding a trimmed document is only worth it if it gets logged.
+            normalized_bytes = (
+                len(compacted_encoded)
+                if normalized is compacted_text
+                else len(normalized.encode("utf-8"))
+            )
+            logger.info(
                 "Compacted document %s from %d bytes to %d bytes.",
                 doc_id,
-                original_bytes,
-                len(normalized.encode("utf-8")),
+                len(original_encoded),
+                normalized_bytes,
             )
 
         return CompactionResult(text=normalized, was_compacted=was_compacted)
 
-    def _enforce_budget(self, text: str, budget: int) -> str:
-        """Ensure text does not exceed the byte budget with a hard trim fallback."""
-        encoded = text.encode("utf-8")
-        if len(encoded) <= budget:
-            return text
-        trimmed = encoded[:budget].decode("utf-8", errors="ignore")
-        return trimmed.rstrip()
+    def _log_failure(self, doc_id: str, exc: BaseException) -> None:
+        logger.error(
+            "Failed to compact document %s with OpenAI model %s: %s",
+            doc_id,
+            self._model,
+            exc,
+        )
 
+    def _enforce_budget(
+        self, text: str, budget: int, encoded: Optional[bytes] = None
+    ) -> str:
+        """Ensure text does not exceed the byte budget with a hard trim fallback.
 
-__all__ = ["CHROMA_DOCUMENT_SIZE_LIMIT", "CompactionResult", "DocumentCompactor"]
+        Pass ``encoded`` when the caller already holds ``text`` as UTF-8 bytes.
+        """
+        if encoded is None:
+            if len(text) * MAX_UTF8_BYTES_PER_CHAR <= budget:
+                return text
+            encoded = text.encode("utf-8")
+        if len(encoded) <= budget:
+            return text
+        # Back up over UTF-8 continuation bytes (0b10xxxxxx) to the start of
+        # the code point straddling the budget; at most three steps.
+        cut = budget
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        return encoded[:cut].decode("utf-8").rstrip()
+
+
+__all__ = [
+    "CHROMA_DOCUMENT_SIZE_LIMIT",
+    "CompactionResult",
+    "DEFAULT_COMPACTION_CONCURRENCY",
+    "DocumentCompactor",
+]
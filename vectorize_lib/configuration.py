@@ -2,15 +2,22 @@
 
 from __future__ import annotations
 
-import json
+import os
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Mapping, Optional
 
 from indexer.models import ModelSpec
+from .utils import json_loads
 
+# ``slots=True`` needs Python 3.10+; older interpreters keep a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+_PATH_SEPARATORS = frozenset({os.sep, os.altsep or os.sep})
+
+
+@dataclass(**_SLOTS)
 class ModelConfig:
     """User-provided configuration for loading a model's CSV export."""
 
@@ -21,25 +28,44 @@ class ModelConfig:
     )
 
 
+def _config_path(raw: str, home: str) -> Path:
+    """Build a ``Path`` for a configured CSV, expanding a leading ``~``.
+
+    The common ``~/...`` form is joined onto the precomputed ``home`` so only
+    one ``Path`` is constructed; ``~user`` forms still
+    defer to :meth:`Path.expanduser`.
+    """
+    if raw[:1] != "~":
+        return Path(raw)
+    if len(raw) == 1 or raw[1] in _PATH_SEPARATORS:
+        return Path(home, raw[2:])
+    return Path(raw).expanduser()
+
+
 def load_config(
     config_path: Path, model_registry: Mapping[str, ModelSpec]
 ) -> Dict[str, ModelConfig]:
     """Load the model-to-CSV mapping from a JSON configuration file."""
-    raw = json.loads(config_path.read_text(encoding="utf-8"))
-    if not isinstance(raw, dict):
+    raw = json_loads(config_path.read_bytes())
+    # JSON decoding only ever yields concrete builtins, so exact type checks
+    # below are equivalent to isinstance() and skip the ABC machinery.
+    if type(raw) is not dict:
         raise ValueError("Configuration file must contain a JSON object")
 
+    home = os.path.expanduser("~")
     config: Dict[str, ModelConfig] = {}
     for model_name, entry in raw.items():
         if model_name not in model_registry:
             raise KeyError(f"Unknown model '{model_name}' in configuration")
-        if entry in (None, "", []):
-            config[model_name] = ModelConfig(path=None, columns={})
+        entry_type = type(entry)
+        if entry_type is str:
+            path = _config_path(entry, home) if entry else None
+            config[model_name] = ModelConfig(path=path, columns={})
             continue
-        if isinstance(entry, str):
-            config[model_name] = ModelConfig(path=Path(entry).expanduser(), columns={})
+        if entry is None or entry == []:
+            config[model_name] = ModelConfig(path=None, columns={})
             continue
-        if not isinstance(entry, dict):
+        if entry_type is not dict:
             raise ValueError(
                 f"Configuration value for '{model_name}' must be a string, object, or null"
             )
@@ -50,14 +76,14 @@ def load_config(
         if raw_path in (None, "", []):
             path = None
         else:
-            path = Path(str(raw_path)).expanduser()
-        if not isinstance(columns, Mapping):
+            path = _config_path(str(raw_path), home)
+        if type(columns) is not dict:
             raise ValueError(
                 f"Configuration value for '{model_name}.columns' must be an object"
             )
         normalized_columns: Dict[str, str] = {}
         for key, value in columns.items():
-            if not isinstance(key, str) or not isinstance(value, str):
+            if type(key) is not str or type(value) is not str:
                 raise ValueError(
                     f"Configuration value for '{model_name}.columns' "
                     "must map strings to strings"
@@ -7,18 +7,26 @@ import hashlib
 import io
 import json
 import logging
+import os
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
 from typing import (
+    AbstractSet,
     Any,
     Callable,
     Dict,
+    FrozenSet,
     Iterator,
     List,
     Mapping,
-    MutableMapping,
     Optional,
+    Sequence,
     Tuple,
+    Type,
     Union,
     cast,
 )
@@ -28,17 +36,83 @@ from pydantic import BaseModel, ValidationError
 from indexer.models import ModelSpec
 from .utils import format_int
 
+# ``slots=True`` needs Python 3.10+; older interpreters keep a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 MetadataValue = Union[str, int, float, bool, None]
 MetadataDict = Dict[str, MetadataValue]
 
+# Shared encoder for canonical payloads. ``json.dumps`` with non-default
+# options builds a fresh JSONEncoder per call; the output (and therefore every
+# document ID) is byte-for-byte identical either way.
+_CANONICAL_JSON = json.JSONEncoder(sort_keys=True, default=str)
+
+# Source CSVs are read front to back once; a larger chunk means far fewer
+# read() syscalls on multi-GB exports. Resume offsets are counted per line by
+# ``_ByteLineReader``, so they are unaffected by the chunk size.
+CSV_READ_BUFFER_SIZE = 1024 * 1024
+
+# Upper bound on distinct keyword values shared per source file; see
+# ``document_builder``.
+KEYWORD_INTERN_LIMIT = 10_000
+
+# Field values treated as "no value" for semantic text and keyword metadata.
+# Kept as a module constant so the list/dict literals are not rebuilt per field.
+_EMPTY_VALUES = (None, "", [], {})
+
+FieldsGetter = Callable[[BaseModel], Tuple[Any, ...]]
+# (model input key, CSV column index or None) pairs; see ``build_row_plan``.
+RowPlan = List[Tuple[str, Optional[int]]]
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class ResumeState:
     """Tracks CSV stream position so resume runs can seek directly to new rows."""
 
     offset: Optional[int] = None
     row_index: int = 0
-    fieldnames: Optional[List[str]] = None
+    fieldnames: Optional[Tuple[str, ...]] = None
+
+
+def _fields_getter(model: Type[BaseModel], fields: Tuple[str, ...]) -> FieldsGetter:
+    """Build a callable returning the values of ``fields`` as a tuple.
+
+    Declared model fields are read with a single C-level ``attrgetter``;
+    anything else keeps the ``getattr(..., None)`` fallback.
+    """
+    if not fields:
+        return lambda instance: ()
+    if all(name in model.model_fields for name in fields):
+        getter = attrgetter(*fields)
+        if len(fields) == 1:
+            return lambda instance: (getter(instance),)
+        return getter
+    return lambda instance: tuple(getattr(instance, name, None) for name in fields)
+
+
+# id(spec) -> (spec, semantic getter, keyword field names, keyword getter).
+# ModelSpec may hold unhashable sequences, so it is keyed by identity and the
+# spec itself is kept to guard against id reuse.
+_SPEC_ACCESSORS: Dict[
+    int, Tuple[ModelSpec, FieldsGetter, Tuple[str, ...], FieldsGetter]
+] = {}
+
+
+def _spec_accessors(
+    spec: ModelSpec,
+) -> Tuple[FieldsGetter, Tuple[str, ...], FieldsGetter]:
+    """Return the cached semantic and keyword field getters for ``spec``."""
+    cached = _SPEC_ACCESSORS.get(id(spec))
+    if cached is None or cached[0] is not spec:
+        keyword_fields = tuple(spec.keyword_fields)
+        cached = (
+            spec,
+            _fields_getter(spec.model, tuple(spec.semantic_fields)),
+            keyword_fields,
+            _fields_getter(spec.model, keyword_fields),
+        )
+        _SPEC_ACCESSORS[id(spec)] = cached
+    return cached[1], cached[2], cached[3]
 
 
 def model_to_dict(instance: BaseModel) -> Dict[str, Any]:
@@ -46,10 +120,25 @@ def model_to_dict(instance: BaseModel) -> Dict[str, Any]:
     return instance.model_dump()
 
 
+def row_validator(model: Type[BaseModel]) -> Callable[[Dict[str, Any]], BaseModel]:
+    """Return the fastest callable that validates a row dict into ``model``.
+
+    ``model_validate`` takes the dict as-is instead of unpacking it into
+    keyword arguments, which is measurably cheaper per row. Models that
+    override ``__init__`` keep being constructed through it so their custom
+    logic still runs.
+    """
+    if model.__init__ is BaseModel.__init__:
+        return model.model_validate
+    return lambda data: model(**data)
+
+
 def build_document_id(model_name: str, instance: BaseModel) -> str:
     """Generate a deterministic identifier for a document."""
-    payload = model_to_dict(instance)
-    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return _document_id(model_name, _CANONICAL_JSON.encode(model_to_dict(instance)))
+
+
+def _document_id(model_name: str, canonical: str) -> str:
     digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
     return f"{model_name}:{digest}"
 
@@ -62,11 +151,16 @@ def build_semantic_text(instance: BaseModel, spec: ModelSpec) -> Tuple[str, bool
         - document_text: The text to be indexed
         - has_semantic_value: True if the document has meaningful semantic content
     """
-    values: List[str] = []
-    for field in spec.semantic_fields:
-        value = getattr(instance, field, None)
-        if value not in (None, "", [], {}):
-            values.append(str(value))
+    semantic_getter, _, _ = _spec_accessors(spec)
+    return _semantic_text(instance, semantic_getter)
+
+
+def _semantic_text(
+    instance: BaseModel, semantic_getter: FieldsGetter, canonical: Optional[str] = None
+) -> Tuple[str, bool]:
+    values = [
+        str(value) for value in semantic_getter(instance) if value not in _EMPTY_VALUES
+    ]
 
     if values:
         joined_text = "\n".join(values)
@@ -74,10 +168,12 @@ def build_semantic_text(instance: BaseModel, spec: ModelSpec) -> Tuple[str, bool
         has_semantic = bool(joined_text.strip())
         return joined_text, has_semantic
 
-    # No semantic fields or all were empty - serialize entire model as fallback
-    fallback_text = json.dumps(model_to_dict(instance), sort_keys=True, default=str)
+    # No semantic fields or all were empty - serialize entire model as fallback.
+    # This is the same canonical JSON the document ID is hashed from.
+    if canonical is None:
+        canonical = _CANONICAL_JSON.encode(model_to_dict(instance))
     # Models with no semantic fields are marked as having no semantic value
-    return fallback_text, False
+    return canonical, False
 
 
 def build_metadata(
@@ -89,43 +185,248 @@ def build_metadata(
     schema_version: Optional[int] = None,
 ) -> MetadataDict:
     """Create metadata dict for ChromaDB."""
+    base_metadata = build_base_metadata(
+        model_name, source_path, extra_metadata, schema_version
+    )
+    protected_keys = {str(key) for key in extra_metadata} if extra_metadata else None
+    return layer_keyword_metadata(instance, spec, base_metadata, protected_keys)
+
+
+def build_base_metadata(
+    model_name: str,
+    source_path: Path,
+    extra_metadata: Optional[Mapping[str, MetadataValue]] = None,
+    schema_version: Optional[int] = None,
+) -> MetadataDict:
+    """Build the metadata shared by every row of one source file."""
     metadata: MetadataDict = {
         "model_name": model_name,
         "source_path": str(source_path),
     }
     if schema_version is not None:
         metadata["schema_version"] = int(schema_version)
-    for field in spec.keyword_fields:
-        value = getattr(instance, field, None)
-        if value not in (None, "", [], {}):
-            metadata[field] = cast(MetadataValue, value)
     if extra_metadata:
         for key, value in extra_metadata.items():
             metadata[str(key)] = cast(MetadataValue, value)
     return metadata
 
 
-def remap_row(
-    row: MutableMapping[str, Any], column_map: Mapping[str, str]
-) -> Dict[str, Any]:
-    """Return a copy of the CSV row with columns renamed to model field names."""
-    if not column_map:
-        return dict(row)
-    remapped: Dict[str, Any] = dict(row)
+def layer_keyword_metadata(
+    instance: BaseModel,
+    spec: ModelSpec,
+    base_metadata: MetadataDict,
+    protected_keys: Optional[AbstractSet[str]] = None,
+) -> MetadataDict:
+    """Copy ``base_metadata`` and add the instance's non-empty keyword fields.
+
+    Keys in ``protected_keys`` keep their base value; pass the extra metadata
+    keys so they still take precedence over keyword fields.
+    """
+    metadata = base_metadata.copy()
+    _, keyword_fields, keyword_getter = _spec_accessors(spec)
+    for field, value in zip(keyword_fields, keyword_getter(instance)):
+        if value not in _EMPTY_VALUES and not (
+            protected_keys and field in protected_keys
+        ):
+            metadata[field] = cast(MetadataValue, value)
+    return metadata
+
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class _ByteLineReader:
+    """Iterate decoded lines of a binary CSV stream, tracking the byte offset.
+
+    Lines are split with ``bytes.splitlines`` (``\\n``, ``\\r`` and ``\\r\\n``,
+    the same boundaries as ``newline=""`` text mode) and decoded one at a
+    time, so no incremental text decoder sits in the read path. ``offset``
+    is the position just past the last line handed out; once ``csv.reader``
+    returns a row it is exactly where the next row starts.
+    """
+
+    def __init__(
+        self,
+        handle: io.BufferedReader,
+        offset: int,
+        *,
+        strip_bom: bool,
+        chunk_size: int = CSV_READ_BUFFER_SIZE,
+    ) -> None:
+        self.offset = offset
+        self._handle = handle
+        self._strip_bom = strip_bom
+        self._chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[str]:
+        read = self._handle.read
+        chunk_size = self._chunk_size
+        offset = self.offset
+        pending = b""
+        if self._strip_bom:
+            pending = read(max(chunk_size, len(_UTF8_BOM)))
+            if pending.startswith(_UTF8_BOM):
+                pending = pending[len(_UTF8_BOM) :]
+                offset += len(_UTF8_BOM)
+                self.offset = offset
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            lines = (pending + chunk).splitlines(keepends=True)
+            # The last piece may be an incomplete line, or a CR whose LF
+            # starts the next chunk; carry it over.
+            pending = lines.pop()
+            for line in lines:
+                offset += len(line)
+                self.offset = offset
+                yield line.decode("utf-8")
+        for line in pending.splitlines(keepends=True):
+            offset += len(line)
+            self.offset = offset
+            yield line.decode("utf-8")
+
+
+DocumentBuilder = Callable[[BaseModel], Tuple[str, str, MetadataDict]]
+
+
+def document_builder(
+    model_name: str,
+    spec: ModelSpec,
+    base_metadata: MetadataDict,
+    protected_keys: Optional[AbstractSet[str]] = None,
+) -> DocumentBuilder:
+    """Return ``build(instance) -> (doc_id, text, metadata)`` specialised for ``spec``.
+
+    Produces the same values as ``build_document_id``, ``build_semantic_text``
+    and ``layer_keyword_metadata`` (plus ``has_sem``), but resolves the field
+    getters once and drops protected keyword fields up front, so the per-row
+    call does no spec lookups or key checks.
+    """
+    semantic_getter, keyword_fields, keyword_getter = _spec_accessors(spec)
+    if protected_keys and not protected_keys.isdisjoint(keyword_fields):
+        keyword_fields = tuple(
+            field for field in keyword_fields if field not in protected_keys
+        )
+        keyword_getter = _fields_getter(spec.model, keyword_fields)
+
+    # Keyword values are usually low-cardinality codes; one shared ``str`` per
+    # distinct value keeps batches and retained samples from holding a fresh
+    # copy per row. The pool stops growing at KEYWORD_INTERN_LIMIT entries.
+    interned: Dict[str, str] = {}
+
+    def build(instance: BaseModel) -> Tuple[str, str, MetadataDict]:
+        # Dumped once per row: hashed for the ID and reused as fallback text.
+        canonical = _CANONICAL_JSON.encode(model_to_dict(instance))
+        text, has_semantic = _semantic_text(instance, semantic_getter, canonical)
+        metadata = base_metadata.copy()
+        for field, value in zip(keyword_fields, keyword_getter(instance)):
+            if value not in _EMPTY_VALUES:
+                if type(value) is str:
+                    shared = interned.get(value)
+                    if shared is not None:
+                        value = shared
+                    elif len(interned) < KEYWORD_INTERN_LIMIT:
+                        interned[value] = value
+                metadata[field] = cast(MetadataValue, value)
+        # Add has_sem metadata to track documents with semantic value
+        metadata["has_sem"] = has_semantic
+        return _document_id(model_name, canonical), text, metadata
+
+    return build
+
+
+def _record_position(
+    resume_state: ResumeState, lines: _ByteLineReader, row_index: int
+) -> None:
+    """Store the byte offset reached after ``row_index`` in ``resume_state``."""
+    resume_state.offset = lines.offset
+    resume_state.row_index = row_index
+
+
+def _advise_sequential(handle: io.BufferedReader) -> None:
+    """Hint the kernel to read ahead aggressively for a front-to-back scan."""
+    if not hasattr(os, "posix_fadvise"):  # pragma: no cover - non-POSIX platforms
+        return
+    try:
+        os.posix_fadvise(handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except OSError:  # pragma: no cover - advisory only
+        pass
+
+
+@lru_cache(maxsize=None)
+def _model_input_keys(model: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """Return the input keys ``model`` can read, or None if every key may matter.
+
+    Rows are only projected for models that ignore extra keys, declare plain
+    string aliases, have no ``before``/``wrap`` model validators and keep
+    ``BaseModel.__init__``; any of those could observe (or, with
+    ``extra="allow"``, store) columns outside the declared fields.
+    """
+    if model.model_config.get("extra", "ignore") != "ignore":
+        return None
+    if model.__init__ is not BaseModel.__init__:
+        return None
+    for decorator in model.__pydantic_decorators__.model_validators.values():
+        if decorator.info.mode != "after":
+            return None
+    keys = set()
+    for name, info in model.model_fields.items():
+        keys.add(name)
+        for alias in (info.alias, info.validation_alias):
+            if alias is None:
+                continue
+            if not isinstance(alias, str):
+                return None
+            keys.add(alias)
+    return frozenset(keys)
+
+
+def build_row_plan(
+    fieldnames: Sequence[str],
+    column_map: Mapping[str, str],
+    model: Type[BaseModel],
+) -> RowPlan:
+    """Resolve each model input key to the CSV column index it reads from.
+
+    Every header column is a candidate key (the last duplicate wins) and each
+    ``column_map`` target takes its source column's index, or None when that
+    column does not exist. Keys the model can never read are dropped so wide
+    CSVs only pay for the columns that matter.
+    """
+    positions: Dict[str, Optional[int]] = {
+        name: index for index, name in enumerate(fieldnames)
+    }
     for target_field, source_column in column_map.items():
-        remapped[target_field] = remapped.get(source_column)
-    return remapped
+        positions[target_field] = positions.get(source_column)
+    input_keys = _model_input_keys(model)
+    if input_keys is None:
+        return list(positions.items())
+    return [(key, index) for key, index in positions.items() if key in input_keys]
 
 
-def normalize_row(row: MutableMapping[str, Any]) -> Dict[str, Any]:
-    """Replace empty strings with None to help Pydantic parse optional fields."""
-    normalized: Dict[str, Any] = {}
-    for key, value in row.items():
-        if isinstance(value, str):
-            normalized[key] = value.strip() if value.strip() else None
-        else:
-            normalized[key] = value
-    return normalized
+def normalize_row_values(
+    row: Sequence[str], plan: RowPlan, header_width: int
+) -> Dict[str, Any]:
+    """Build the model input for one CSV row following ``plan``.
+
+    Values are stripped and blank values become None so Pydantic can parse
+    optional fields; columns missing from a short row read as None.
+    """
+    if len(row) >= header_width:
+        return {
+            key: (row[index].strip() or None) if index is not None else None
+            for key, index in plan
+        }
+    width = len(row)
+    return {
+        key: (
+            (row[index].strip() or None)
+            if index is not None and index < width
+            else None
+        )
+        for key, index in plan
+    }
 
 
 def iter_documents(
@@ -152,7 +453,8 @@ def iter_documents(
             fieldnames_override = list(resume_state.fieldnames)
 
     effective_skip = max(0, skip)
-    with csv_path.open("rb") as raw_handle:
+    with csv_path.open("rb", buffering=CSV_READ_BUFFER_SIZE) as raw_handle:
+        _advise_sequential(raw_handle)
         if start_offset is not None:
             try:
                 raw_handle.seek(start_offset)
@@ -173,14 +475,19 @@ def iter_documents(
                     resume_state.row_index = 0
                     resume_state.fieldnames = None
 
-        text_handle = io.TextIOWrapper(raw_handle, encoding="utf-8-sig", newline="")
-        reader = csv.DictReader(text_handle, fieldnames=fieldnames_override)
-        actual_fieldnames = list(reader.fieldnames or [])
+        lines = _ByteLineReader(
+            raw_handle, start_offset or 0, strip_bom=start_offset is None
+        )
+        reader = csv.reader(lines)
+        if fieldnames_override is not None:
+            actual_fieldnames = fieldnames_override
+        else:
+            actual_fieldnames = next(reader, None) or []
         if not actual_fieldnames:
             logging.warning("Skipped %s: no header found", csv_path)
             return
         if resume_state:
-            resume_state.fieldnames = actual_fieldnames
+            resume_state.fieldnames = tuple(actual_fieldnames)
 
         if start_offset is not None:
             effective_skip = 0
@@ -188,49 +495,54 @@ def iter_documents(
         else:
             starting_row = 1
 
-        skip_notified = False
-
-        for row_index, row in enumerate(reader, start=starting_row):
-            if resume_state:
-                try:
-                    resume_state.offset = raw_handle.tell()
-                except OSError:
-                    resume_state.offset = None
-                resume_state.row_index = row_index
-
-            if effective_skip and row_index <= effective_skip:
-                if (
-                    not skip_notified
-                    and row_index >= effective_skip
-                    and on_skip_complete
-                    and resume_state
-                ):
+        # Rows are read as lists and mapped straight to the model input keys
+        # they feed, in a single comprehension per row.
+        row_plan = build_row_plan(actual_fieldnames, column_map, spec.model)
+        header_width = len(actual_fieldnames)
+        validate_row = row_validator(spec.model)
+        # Metadata shared by every row is built once and copied per document.
+        base_metadata = build_base_metadata(
+            model_name, csv_path, extra_metadata, schema_version
+        )
+        build_document = document_builder(
+            model_name,
+            spec,
+            base_metadata,
+            {str(key) for key in extra_metadata} if extra_metadata else None,
+        )
+
+        # The resume state is only observed at a yield, in on_skip_complete,
+        # or once iteration stops, so the position is recorded there rather
+        # than on every row.
+        row_index: Optional[int] = None
+        try:
+            # filter(None, ...) drops blank rows, which DictReader never yielded.
+            rows = enumerate(filter(None, reader), start=starting_row)
+            if effective_skip:
+                # Skipped rows are only counted, in a loop of their own so the
+                # main loop below carries no skip checks.
+                for row_index, _ in islice(rows, effective_skip):
+                    pass
+                if row_index == effective_skip and on_skip_complete and resume_state:
+                    _record_position(resume_state, lines, row_index)
                     on_skip_complete(resume_state)
-                    skip_notified = True
-                continue
 
-            remapped = remap_row(row, column_map)
-            normalized = normalize_row(remapped)
-            try:
-                instance = spec.model(**normalized)
-            except ValidationError as exc:
-                logging.warning(
-                    "Skipping %s row %d due to validation error: %s",
-                    csv_path,
-                    row_index,
-                    exc.errors(),
-                )
-                continue
-            doc_id = build_document_id(model_name, instance)
-            document_text, has_semantic_value = build_semantic_text(instance, spec)
-            metadata = build_metadata(
-                instance,
-                spec,
-                model_name,
-                csv_path,
-                extra_metadata=extra_metadata,
-                schema_version=schema_version,
-            )
-            # Add has_sem metadata to track documents with semantic value
-            metadata["has_sem"] = has_semantic_value
-            yield row_index, doc_id, document_text, metadata
+            for row_index, row in rows:
+                normalized = normalize_row_values(row, row_plan, header_width)
+                try:
+                    instance = validate_row(normalized)
+                except ValidationError as exc:
+                    logging.warning(
+                        "Skipping %s row %d due to validation error: %s",
+                        csv_path,
+                        row_index,
+                        exc.errors(),
+                    )
+                    continue
+                doc_id, document_text, metadata = build_document(instance)
+                if resume_state:
+                    _record_position(resume_state, lines, row_index)
+                yield row_index, doc_id, document_text, metadata
+        finally:
+            if resume_state and row_index is not None:
+                _record_position(resume_state, lines, row_index)
@@ -2,17 +2,31 @@
 
 from __future__ import annotations
 
-import json
+import math
 import random
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Tuple
 from .documents import MetadataDict
+from .utils import json_dumps
 
+# ``slots=True`` needs Python 3.10+; older interpreters keep a plain dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+TEXT_PREVIEW_CHARS = 200
+
+# (row index, document ID, text, metadata), as yielded by ``iter_documents``.
+DocumentPayload = Tuple[int, str, str, MetadataDict]
+
+
+@dataclass(**_SLOTS)
 class SampledDocument:
-    """Container for a sampled document during an E2E test run."""
+    """Container for a sampled document during an E2E test run.
+
+    The full text is kept because sampled documents are indexed afterwards;
+    only the recorder works from the preview.
+    """
 
     row_index: int
     doc_id: str
@@ -21,27 +35,60 @@ class SampledDocument:
 
 
 class ReservoirSampler:
-    """Reservoir sampler that retains a fixed number of random items."""
+    """Reservoir sampler that retains a fixed number of random items.
+
+    Uses Li's Algorithm L: once the reservoir is full it draws how many items
+    to skip before the next replacement, so the RNG is consulted
+    O(k * log(n / k)) times instead of once per offered item. Offered
+    payloads are stored as-is; ``SampledDocument`` objects are only built for
+    the final sample.
+    """
 
     def __init__(self, capacity: int, rng: random.Random) -> None:
         self.capacity = max(0, int(capacity))
         self._rng = rng
-        self._items: List[SampledDocument] = []
+        self._items: List[DocumentPayload] = []
         self._seen = 0
+        self._weight = 0.0
+        self._skip = 0
 
-    def offer(self, item: SampledDocument) -> None:
+    def offer(self, item: DocumentPayload) -> None:
         if self.capacity <= 0:
             return
         self._seen += 1
+        if self._skip:
+            self._skip -= 1
+            return
         if len(self._items) < self.capacity:
             self._items.append(item)
+            if len(self._items) == self.capacity:
+                self._weight = self._draw_weight()
+                self._skip = self._draw_skip()
             return
-        j = self._rng.randint(1, self._seen)
-        if j <= self.capacity:
-            self._items[j - 1] = item
+        self._items[self._rng.randrange(self.capacity)] = item
+        self._weight *= self._draw_weight()
+        self._skip = self._draw_skip()
+
+    def _uniform(self) -> float:
+        """Return a uniform draw from the open interval (0, 1)."""
+        value = self._rng.random()
+        while value == 0.0:
+            value = self._rng.random()
+        return value
+
+    def _draw_weight(self) -> float:
+        return math.exp(math.log(self._uniform()) / self.capacity)
+
+    def _draw_skip(self) -> int:
+        return int(math.log(self._uniform()) / math.log1p(-self._weight))
 
     def results(self) -> List[SampledDocument]:
-        return list(self._items)
+        return [
+            SampledDocument(
+                row_index=row_index, doc_id=doc_id, text=text, metadata=metadata
+            )
+            for row_index, doc_id, text, metadata in self._items
+        ]
 
 
 @dataclass
@@ -58,22 +105,22 @@ class E2ETestRecorder:
         csv_path: Path,
         sample: SampledDocument,
     ) -> None:
-        text_preview = sample.text[:200]
-        entry = {
-            "model": model_name,
-            "csv_path": str(csv_path),
-            "row_index": sample.row_index,
-            "doc_id": sample.doc_id,
-            "metadata": sample.metadata,
-            "text_preview": text_preview,
-            "partition": sample.metadata.get("partition_name"),
-        }
-        self.entries.append(entry)
+        metadata = sample.metadata
+        self.entries.append(
+            {
+                "model": model_name,
+                "csv_path": str(csv_path),
+                "row_index": sample.row_index,
+                "doc_id": sample.doc_id,
+                "metadata": metadata,
+                "text_preview": sample.text[:TEXT_PREVIEW_CHARS],
+                "partition": metadata.get("partition_name"),
+            }
+        )
 
     def write(self) -> None:
         self.output_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.output_path.open("w", encoding="utf-8") as handle:
-            json.dump(self.entries, handle, indent=2)
+        self.output_path.write_bytes(json_dumps(self.entries, indent=True))
 
 
 @dataclass
@@ -89,18 +136,12 @@ class E2ETestConfig:
         *,
         model_name: str,
         csv_path: Path,
-        documents: Iterable[tuple[int, str, str, MetadataDict]],
+        documents: Iterable[DocumentPayload],
     ) -> List[SampledDocument]:
         sampler = ReservoirSampler(self.sample_size, self.rng)
-        for row_index, doc_id, text, metadata in documents:
-            sampler.offer(
-                SampledDocument(
-                    row_index=row_index,
-                    doc_id=doc_id,
-                    text=text,
-                    metadata=metadata,
-                )
-            )
+        offer = sampler.offer
+        for document in documents:
+            offer(document)
         samples = sampler.results()
         for sample in samples:
             self.recorder.record(
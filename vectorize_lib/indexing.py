@@ -2,18 +2,42 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import math
 import os
+import queue
+import random
 import re
+import threading
+import time
 import traceback
+from bisect import bisect_right
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from itertools import accumulate, islice
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Optional, Sequence, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
 from chromadb import errors as chroma_errors
 from chromadb.api import Collection
+from chromadb.api.types import Documents, Embeddings
 from chromadb.utils.embedding_functions import (
     EmbeddingFunction,
     OpenAIEmbeddingFunction,
@@ -41,12 +65,61 @@ from .utils import (
     MAX_DOCS_PER_REQUEST,
     MAX_TOKENS_PER_REQUEST,
     TOKEN_SAFETY_LIMIT,
+    collection_ids,
     count_tokens,
+    count_tokens_batch,
+    extract_retry_after_seconds,
     format_int,
     get_path_signature,
+    iter_collection_ids,
+    iter_exception_chain,
+    save_completion_state,
     summarize_collection,
 )
 
+# Most IDs the duplicate precheck keeps in memory when it can skip Chroma;
+# see ``index_from_config``. Past that, up to KNOWN_ID_FILTER_LIMIT IDs are
+# tracked approximately in an ``_IdFilter`` with KNOWN_ID_FILTER_ERROR_RATE
+# false positives. The filter is sized for twice the IDs it starts with and
+# reloaded from the collection when it fills.
+KNOWN_ID_LIMIT = 1_000_000
+KNOWN_ID_FILTER_LIMIT = 50_000_000
+KNOWN_ID_FILTER_ERROR_RATE = 0.001
+
+# Documents are parsed on a reader thread in chunks of PREFETCH_CHUNK_SIZE,
+# with at most PREFETCH_MAX_CHUNKS chunks waiting; see ``_prefetch_documents``.
+PREFETCH_CHUNK_SIZE = 64
+PREFETCH_MAX_CHUNKS = 16
+
+# During a model's run the completion state file is written after
+# STATE_PERSIST_INTERVAL batches or STATE_PERSIST_SECONDS, whichever comes
+# first. It is always written when a model completes or indexing fails.
+STATE_PERSIST_INTERVAL = 10
+STATE_PERSIST_SECONDS = 30.0
+
+# Threads tiktoken may use to count the tokens of one prefetched chunk.
+TOKENIZER_THREADS = min(8, os.cpu_count() or 1)
+
+# Each upsert batch is embedded as sub-batches of EMBEDDING_SUB_BATCH_SIZE
+# inputs, with up to EMBEDDING_CONCURRENCY OpenAI requests in flight.
+EMBEDDING_SUB_BATCH_SIZE = 512
+EMBEDDING_CONCURRENCY = 8
+
+# A batch whose upsert fails with a transient error (rate limit, dropped
+# connection, OpenAI server error) is retried up to UPSERT_MAX_RETRIES times,
+# waiting UPSERT_RETRY_BASE_SECONDS * 2**attempt plus jitter, or the server's
+# retry-after hint, capped at UPSERT_RETRY_MAX_SECONDS.
+UPSERT_MAX_RETRIES = 5
+UPSERT_RETRY_BASE_SECONDS = 1.0
+UPSERT_RETRY_MAX_SECONDS = 60.0
+
+# Document IDs ("<model>:<hex digest>") named in a DuplicateIDError message.
+_DUPLICATE_ID_PATTERN = re.compile(r"\b[^,\s]+:[0-9a-fA-F]{16,}\b")
+# Most error reports sharing one timestamp and model; later ones get "_N".
+ERROR_REPORT_MAX_SUFFIXES = 10_000
+# Characters replaced with "_" in error report file names.
+_UNSAFE_FILENAME_PATTERN = re.compile(r"[^0-9A-Za-z_.-]")
+
 InvalidCollectionError = cast(
     type[BaseException],
     getattr(
@@ -57,6 +130,100 @@ InvalidCollectionError = cast(
 )
 
 
+class _IdFilter:
+    """Bloom filter over document IDs.
+
+    Membership tests never miss an added ID; an ID that was not added is
+    reported present with a probability of about ``error_rate`` while no more
+    than ``capacity`` IDs have been added. Past that the rate climbs, so
+    callers check ``full`` and build a larger filter.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.count = 0
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, doc_id: str) -> Iterator[int]:
+        digest = hashlib.blake2b(doc_id.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def add(self, doc_id: str) -> None:
+        self.count += 1
+        for position in self._positions(doc_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, doc_ids: Iterable[str]) -> None:
+        for doc_id in doc_ids:
+            self.add(doc_id)
+
+    def __contains__(self, doc_id: object) -> bool:
+        if not isinstance(doc_id, str):
+            return False
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(doc_id)
+        )
+
+
+_TRANSIENT_UPSERT_ERRORS: Tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+)
+try:  # pragma: no cover - optional dependency probing
+    import openai
+except ImportError:  # pragma: no cover - optional dependency probing
+    pass
+else:
+    _TRANSIENT_UPSERT_ERRORS += (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+try:  # pragma: no cover - optional dependency probing
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency probing
+    pass
+else:
+    _TRANSIENT_UPSERT_ERRORS += (httpx.TransportError,)
+if isinstance(getattr(chroma_errors, "RateLimitError", None), type):
+    _TRANSIENT_UPSERT_ERRORS += (chroma_errors.RateLimitError,)
+
+
+def _upsert_retry_delay(exc: BaseException, attempt: int) -> Optional[float]:
+    """Return the seconds to wait before retrying a failed upsert.
+
+    Returns None when the error is not transient, is an exhausted OpenAI
+    quota, or ``attempt`` retries have already been made.
+    """
+
+    if attempt >= UPSERT_MAX_RETRIES:
+        return None
+    chain = list(iter_exception_chain(exc))
+    if not any(isinstance(candidate, _TRANSIENT_UPSERT_ERRORS) for candidate in chain):
+        return None
+    # A 429 for an exhausted quota will not clear by waiting.
+    if any(
+        getattr(candidate, "code", None) == "insufficient_quota" for candidate in chain
+    ):
+        return None
+    delay = extract_retry_after_seconds(exc)
+    if delay is None:
+        delay = UPSERT_RETRY_BASE_SECONDS * 2**attempt + random.random()
+    return min(UPSERT_RETRY_MAX_SECONDS, delay)
+
+
 def _write_error_report(
     *,
     error_dir: Optional[Path],
@@ -94,13 +261,8 @@ def _write_error_report(
     now = datetime.now(timezone.utc).replace(tzinfo=None)
     timestamp = now.isoformat(timespec="seconds")
     sortable_stamp = now.strftime("%Y%m%dT%H%M%S%fZ")
-    safe_model = re.sub(r"[^0-9A-Za-z_.-]", "_", model_name) or "model"
-    filename = f"{sortable_stamp}_{safe_model}.yaml"
-    candidate = target_root / filename
-    counter = 1
-    while candidate.exists():
-        candidate = target_root / f"{sortable_stamp}_{safe_model}_{counter}.yaml"
-        counter += 1
+    safe_model = _UNSAFE_FILENAME_PATTERN.sub("_", model_name) or "model"
+    base_name = f"{sortable_stamp}_{safe_model}"
 
     partition_names = {
         meta.get("partition_name")
@@ -135,7 +297,7 @@ def _write_error_report(
     if getattr(resume_state, "offset", None) is not None:
         resume_payload["offset"] = int(cast(int, resume_state.offset))
     if getattr(resume_state, "fieldnames", None):
-        resume_payload["fieldnames"] = list(cast(List[str], resume_state.fieldnames))
+        resume_payload["fieldnames"] = resume_state.fieldnames
 
     payload: Dict[str, Any] = {
         "timestamp": timestamp,
@@ -158,24 +320,197 @@ def _write_error_report(
     }
 
     try:
-        try:
-            import yaml  # type: ignore
-        except ImportError:  # pragma: no cover - optional dependency
-            yaml = None  # type: ignore
-
-        if yaml is not None:  # type: ignore
-            serialized = yaml.safe_dump(payload, sort_keys=False)  # type: ignore
-        else:
-            serialized = json.dumps(payload, indent=2)
-
-        candidate.write_text(serialized, encoding="utf-8")
+        import yaml  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        yaml = None  # type: ignore
+
+    # O_EXCL claims the name atomically; a report written concurrently
+    # under the same timestamp pushes this one to the next suffix.
+    candidate = target_root / f"{base_name}.yaml"
+    fd: Optional[int] = None
+    try:
+        for counter in range(ERROR_REPORT_MAX_SUFFIXES):
+            suffix = f"_{counter}" if counter else ""
+            candidate = target_root / f"{base_name}{suffix}.yaml"
+            try:
+                fd = os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                continue
+            break
     except OSError as exc:  # pragma: no cover - defensive
+        logging.warning("Failed to create error report %s: %s", candidate, exc)
+        return None
+    if fd is None:
+        logging.warning(
+            "Failed to write error report for %s: %d report names under %s "
+            "are taken.",
+            model_name,
+            ERROR_REPORT_MAX_SUFFIXES,
+            target_root,
+        )
+        return None
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            if yaml is not None:  # type: ignore
+                yaml.safe_dump(payload, handle, sort_keys=False)  # type: ignore
+            else:
+                json.dump(payload, handle, indent=2)
+    except Exception as exc:
+        # Drop the partial report; the caller goes on to raise the upsert error.
         logging.warning("Failed to write error report %s: %s", candidate, exc)
+        try:
+            candidate.unlink()
+        except OSError:  # pragma: no cover - defensive
+            pass
         return None
 
     return candidate
 
 
+DocumentPayload = Tuple[int, str, str, MetadataDict]
+
+
+def _prefetch_documents(
+    open_documents: Callable[[ResumeState], Iterator[DocumentPayload]],
+    resume_state: ResumeState,
+    encoder: Any = None,
+) -> Iterator[Tuple[DocumentPayload, Optional[int]]]:
+    """Yield ``(document, token_count)`` pairs parsed ahead on a background thread.
+
+    CSV parsing, validation and, given an ``encoder``, token counting then
+    overlap with the embedding/upsert round-trips of the indexing loop. Each
+    chunk's texts are counted together with ``count_tokens_batch``; the count
+    is None when no encoder was given or counting failed, and the caller then
+    counts that document itself. The reader works on a
+    private copy of ``resume_state``; each document carries the position
+    recorded when it was read, and that position is copied into
+    ``resume_state`` just before the document is yielded. Persisted resume
+    offsets therefore never run ahead of the documents the caller has seen.
+    Errors raised while reading are re-raised here.
+    """
+    reader_state = ResumeState(
+        offset=resume_state.offset,
+        row_index=resume_state.row_index,
+        fieldnames=resume_state.fieldnames,
+    )
+    chunks: "queue.Queue[Any]" = queue.Queue(maxsize=PREFETCH_MAX_CHUNKS)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def read() -> None:
+        documents = open_documents(reader_state)
+        chunk: List[Tuple[DocumentPayload, Optional[int], int]] = []
+
+        def put_chunk() -> bool:
+            token_counts: List[Optional[int]] = [None] * len(chunk)
+            if encoder is not None:
+                try:
+                    token_counts = count_tokens_batch(
+                        [document[2] for document, _, _ in chunk],
+                        encoder,
+                        num_threads=TOKENIZER_THREADS,
+                    )
+                except Exception:  # the consumer recounts and raises in order
+                    pass
+            return put(
+                [
+                    (document, offset, row_index, token_count)
+                    for (document, offset, row_index), token_count in zip(
+                        chunk, token_counts
+                    )
+                ]
+            )
+
+        try:
+            for document in documents:
+                chunk.append((document, reader_state.offset, reader_state.row_index))
+                if len(chunk) >= PREFETCH_CHUNK_SIZE:
+                    if not put_chunk():
+                        return
+                    chunk = []
+            if chunk and not put_chunk():
+                return
+            put(finished)
+        except BaseException as exc:  # re-raised in the consuming thread
+            # Hand over what was read before the error, as a plain loop would.
+            if chunk and not put_chunk():
+                return
+            put(exc)
+        finally:
+            documents.close()
+
+    reader = threading.Thread(target=read, name="idxr-csv-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is finished:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            for document, offset, row_index, token_count in item:
+                resume_state.offset = offset
+                resume_state.row_index = row_index
+                resume_state.fieldnames = reader_state.fieldnames
+                yield document, token_count
+        # The reader is done; take its final position, which also covers
+        # trailing rows that produced no document.
+        resume_state.offset = reader_state.offset
+        resume_state.row_index = reader_state.row_index
+        resume_state.fieldnames = reader_state.fieldnames
+    finally:
+        stop.set()
+        reader.join()
+
+
+class ConcurrentOpenAIEmbeddingFunction(OpenAIEmbeddingFunction):
+    """OpenAI embedding function that embeds one batch with parallel requests.
+
+    Chroma calls the embedding function once per upsert, so the stock
+    function pays one embeddings round-trip per batch. This one splits the
+    batch into sub-batches and sends them from a thread pool, returning the
+    embeddings in input order. Rate-limit retries with backoff are left to
+    the OpenAI client. The Chroma config name stays ``"openai"``, so
+    collections created with it reopen with the stock function.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        sub_batch_size: int = EMBEDDING_SUB_BATCH_SIZE,
+        max_concurrency: int = EMBEDDING_CONCURRENCY,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.sub_batch_size = max(1, sub_batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embed = super().__call__
+        if len(input) <= self.sub_batch_size or self.max_concurrency == 1:
+            return embed(input)
+        sub_batches = [
+            input[start : start + self.sub_batch_size]
+            for start in range(0, len(input), self.sub_batch_size)
+        ]
+        workers = min(self.max_concurrency, len(sub_batches))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="idxr-embed"
+        ) as executor:
+            results = list(executor.map(embed, sub_batches))
+        return [embedding for result in results for embedding in result]
+
+
 def create_embedding_function(
     model_name: str, api_key: Optional[str] = None
 ) -> EmbeddingFunction[Any]:
@@ -185,7 +520,7 @@ def create_embedding_function(
         raise RuntimeError(
             "OpenAI API key is required (use --openai-api-key or set OPENAI_API_KEY)."
         )
-    embedding_function = OpenAIEmbeddingFunction(
+    embedding_function = ConcurrentOpenAIEmbeddingFunction(
         api_key=api_key,
         model_name=model_name,
     )
@@ -263,17 +598,13 @@ def index_from_config(
                 )
             for model_name, count_value in scanned_counts.items():
                 resume_counts[model_name] = count_value
+                if completion_state_path:
+                    entry = completion_state.setdefault(model_name, {})
+                    entry.setdefault("started", True)
+                    entry.setdefault("collection_count", count_value)
             if completion_state_path:
                 try:
-                    completion_state_path.parent.mkdir(parents=True, exist_ok=True)
-                    for model_name, count_value in scanned_counts.items():
-                        entry = completion_state.setdefault(model_name, {})
-                        entry.setdefault("started", True)
-                        entry.setdefault("collection_count", count_value)
-                    completion_state_path.write_text(
-                        json.dumps(completion_state, indent=2),
-                        encoding="utf-8",
-                    )
+                    save_completion_state(completion_state_path, completion_state)
                 except OSError as exc:
                     logging.warning(
                         "Failed to update completion metadata with scanned counts: %s",
@@ -287,18 +618,81 @@ def index_from_config(
                 format_int(total_known),
             )
 
+    # The duplicate precheck is answered from ``known_ids`` without a ``get``
+    # round-trip once the IDs already in the collection are paged in, and it
+    # grows with every upsert of this run. IDs are content hashes, so a
+    # concurrent writer adding the same ID only means an identical document
+    # is upserted twice. Past KNOWN_ID_LIMIT IDs they move to ``id_filter``,
+    # and only the IDs it may contain are checked with Chroma. An empty
+    # collection starts with an empty ``known_ids``; otherwise the existing
+    # IDs are paged in only once the run has issued as many precheck ``get``
+    # calls as the paging would take, so short runs against a large
+    # collection never pay for it.
+    known_ids: Optional[Set[str]] = None
+    id_filter: Optional[_IdFilter] = None
+    precheck_pages = 0
+    precheck_gets = 0
+    try:
+        existing_total = collection.count()
+        if existing_total == 0:
+            known_ids = set()
+        elif existing_total <= KNOWN_ID_FILTER_LIMIT:
+            precheck_pages = -(-existing_total // resume_chunk_size)
+    except Exception as exc:  # pragma: no cover - defensive
+        logging.warning("Failed to count existing documents: %s", exc)
+
+    def load_precheck_ids() -> None:
+        """Page the collection's IDs into ``known_ids`` or ``id_filter``."""
+        nonlocal known_ids, id_filter
+        try:
+            total = collection.count()
+            if total <= KNOWN_ID_LIMIT:
+                known_ids = collection_ids(collection, resume_chunk_size)
+                logging.info(
+                    "Loaded %s existing document ID(s) for the duplicate precheck.",
+                    format_int(len(known_ids)),
+                )
+                return
+            capacity = min(2 * total, KNOWN_ID_FILTER_LIMIT)
+            if capacity <= total:
+                logging.info(
+                    "Collection holds %s document IDs, more than the duplicate "
+                    "precheck filter tracks; prechecks query the collection.",
+                    format_int(total),
+                )
+                return
+            loaded = _IdFilter(capacity, KNOWN_ID_FILTER_ERROR_RATE)
+            for page in iter_collection_ids(collection, resume_chunk_size):
+                loaded.update(page)
+        except Exception as exc:  # pragma: no cover - defensive
+            logging.warning("Failed to load existing document IDs: %s", exc)
+            return
+        id_filter = loaded
+        logging.info(
+            "Loaded %s existing document ID(s) into the duplicate precheck "
+            "filter (capacity %s).",
+            format_int(loaded.count),
+            format_int(capacity),
+        )
+
     counts: Dict[str, int] = {}
+    # Several models may read the same CSV; stat each path once.
+    path_signatures: Dict[Path, Optional[Dict[str, float]]] = {}
     for model_name, model_config in config.items():
         csv_path = model_config.path
         if csv_path is None:
             logging.info("Skipping %s: no CSV path provided", model_name)
             continue
-        if not csv_path.exists():
+        if csv_path in path_signatures:
+            current_signature = path_signatures[csv_path]
+        else:
+            current_signature = get_path_signature(csv_path)
+            path_signatures[csv_path] = current_signature
+        if current_signature is None and not csv_path.exists():
             logging.warning(
                 "Skipping %s: CSV path %s does not exist", model_name, csv_path
             )
             continue
-        current_signature = get_path_signature(csv_path)
         stored_state = completion_state.get(model_name, {})
         if stored_state.get("complete"):
             stored_signature = stored_state.get("source_signature")
@@ -332,7 +726,7 @@ def index_from_config(
             if isinstance(fieldnames_value, list) and all(
                 isinstance(item, str) for item in fieldnames_value
             ):
-                resume_state.fieldnames = list(fieldnames_value)
+                resume_state.fieldnames = tuple(fieldnames_value)
 
         previous_offset = (
             resume_state.offset if resume_state.offset is not None else None
@@ -354,6 +748,9 @@ def index_from_config(
         current_token_total = 0
         added = 0
         batches = 0
+        unpersisted_batches = 0
+        last_persisted: Optional[Tuple[Any, ...]] = None
+        last_persist_time = time.monotonic()
         collection_count_so_far = existing_count
         effective_batch_size = min(batch_size, MAX_DOCS_PER_REQUEST)
         if effective_batch_size < batch_size:
@@ -386,7 +783,9 @@ def index_from_config(
             model_key: str = current_model_name,
             completion_state_ref: Optional[Dict[str, Any]] = None,
             completion_state_path_ref: Optional[Path] = None,
+            write: bool = True,
         ) -> None:
+            nonlocal unpersisted_batches, last_persisted, last_persist_time
             state_store = (
                 completion_state
                 if completion_state_ref is None
@@ -420,16 +819,35 @@ def index_from_config(
                 entry.pop("file_offset", None)
             entry["row_index"] = int(state.row_index)
             if state.fieldnames:
-                entry["fieldnames"] = list(state.fieldnames)
+                # Immutable once the header is read, so share it.
+                entry["fieldnames"] = state.fieldnames
             else:
                 entry.pop("fieldnames", None)
+            if not write:
+                return
+            progress = (
+                is_complete,
+                state.offset,
+                state.row_index,
+                documents_indexed,
+                collection_total,
+            )
+            if progress == last_persisted:
+                # Only the timestamp would change; the file is already current.
+                unpersisted_batches = 0
+                last_persist_time = time.monotonic()
+                return
             try:
-                path_ref.parent.mkdir(parents=True, exist_ok=True)
-                path_ref.write_text(json.dumps(state_store, indent=2), encoding="utf-8")
+                # Checkpoints are compact; the final write stays readable.
+                save_completion_state(path_ref, state_store, indent=is_complete)
             except OSError as exc:
                 logging.warning(
                     "Failed to update completion metadata for %s: %s", model_key, exc
                 )
+            else:
+                unpersisted_batches = 0
+                last_persisted = progress
+                last_persist_time = time.monotonic()
 
         def flush_batch(
             reason: str,
@@ -451,261 +869,355 @@ def index_from_config(
         ) -> int:
             nonlocal ids, documents, metadatas, token_counts, row_numbers
             nonlocal current_token_total, added, batches, effective_batch_size
-            nonlocal collection_count_so_far
+            nonlocal collection_count_so_far, known_ids, unpersisted_batches
+            nonlocal id_filter, precheck_pages, precheck_gets
 
             local_batch_size = batch_limit
 
             if not ids_ref:
                 return batch_limit
 
-            while ids_ref:
-                n = min(len(ids_ref), local_batch_size)
-                emitted_ids = ids_ref[:n]
-                emitted_docs = documents_ref[:n]
-                emitted_metas: List[MetadataDict] = metadatas_ref[:n]
-                emitted_tokens = token_counts_ref[:n]
-                emitted_rows = row_numbers_ref[:n]
-                emitted_token_total = sum(emitted_tokens)
-
-                try:
-                    existing_resp = collection_ref.get(ids=emitted_ids, include=[])
-                    existing_list = (
-                        existing_resp.get("ids")
-                        if isinstance(existing_resp, Mapping)
-                        else None
-                    )
-                except Exception as exc:  # pragma: no cover - defensive
-                    logging.warning(
-                        "Failed to precheck duplicates for %s: %s", model_key, exc
-                    )
-                    existing_list = None
-                if existing_list:
-                    existing_set = set(existing_list)
-                    removal_indices = [
-                        idx
-                        for idx, doc_id in enumerate(emitted_ids)
-                        if doc_id in existing_set
-                    ]
-                    if removal_indices:
-                        sample = ", ".join(list(existing_set)[:5])
-                        if len(existing_set) > 5:
-                            sample += ", ..."
-                        logging.info(
-                            "Preemptively removing %s duplicate id(s) for %s before upsert: %s",
-                            format_int(len(removal_indices)),
-                            model_key,
-                            sample,
-                        )
-                        for remove_idx in reversed(removal_indices):
-                            del ids_ref[remove_idx]
-                            del documents_ref[remove_idx]
-                            del metadatas_ref[remove_idx]
-                            del token_counts_ref[remove_idx]
-                            del row_numbers_ref[remove_idx]
-                        current_token_total = sum(token_counts_ref)
-                        if not ids_ref:
-                            break
-                        continue
-
-                while emitted_token_total > token_limit_value and n > 1:
-                    n -= 1
-                    emitted_ids = ids_ref[:n]
-                    emitted_docs = documents_ref[:n]
-                    emitted_metas = metadatas_ref[:n]
-                    emitted_tokens = token_counts_ref[:n]
-                    emitted_rows = row_numbers_ref[:n]
-                    emitted_token_total = sum(emitted_tokens)
-
-                if emitted_token_total > token_limit_value:
-                    single_tokens = token_counts_ref[0]
-                    doc_id = ids_ref[0]
-                    if single_tokens > MAX_TOKENS_PER_REQUEST:
-                        logging.error(
-                            "Skipping document %s in %s: %s tokens exceed hard API limit %s.",
-                            doc_id,
-                            model_key,
-                            format_int(single_tokens),
-                            format_int(MAX_TOKENS_PER_REQUEST),
-                        )
-                        ids_ref.pop(0)
-                        documents_ref.pop(0)
-                        metadatas_ref.pop(0)
-                        token_counts_ref.pop(0)
-                        current_token_total = sum(token_counts_ref)
-                        continue
-                    logging.warning(
-                        "Document %s in %s is %s tokens (> %s safety limit); sending alone.",
-                        doc_id,
-                        model_key,
-                        format_int(single_tokens),
-                        format_int(token_limit_value),
-                    )
-                    emitted_ids = ids_ref[:1]
-                    emitted_docs = documents_ref[:1]
-                    emitted_metas = metadatas_ref[:1]
-                    emitted_tokens = token_counts_ref[:1]
-                    emitted_rows = row_numbers_ref[:1]
-                    emitted_token_total = single_tokens
-                    n = 1
-
-                if n < local_batch_size:
-                    logging.info(
-                        "Adjusting effective batch size for %s from %s to "
-                        "%s due to token limits (%s tokens, reason=%s).",
-                        model_key,
-                        format_int(effective_batch_size),
-                        format_int(n),
-                        format_int(emitted_token_total),
-                        reason,
-                    )
-                    batch_limit = max(1, n)
-                    effective_batch_size = batch_limit
-                    local_batch_size = batch_limit
-
-                retry_after_duplicate = False
-                while True:
-                    try:
-                        collection_ref.upsert(
-                            ids=emitted_ids,
-                            documents=emitted_docs,
-                            metadatas=emitted_metas,  # type: ignore[arg-type]
-                        )
-                    except chroma_errors.DuplicateIDError as exc:
-                        msg = str(exc)
-                        dup_set: Optional[set] = getattr(exc, "ids", None)
-                        if dup_set is None:
-                            dup_matches = re.findall(
-                                r"\b[^,\s]+:[0-9a-fA-F]{16,}\b",
-                                msg,
-                            )
-                            dup_set = set(dup_matches)
+            # Documents before ``start`` have been sent (or dropped) during this
+            # flush. The buffers are only trimmed once, on the way out, instead
+            # of shifting every list after each sub-batch.
+            start = 0
+            # Transient-error retries of the batch at ``start``; duplicate
+            # removal retries the same batch without touching the budget.
+            upsert_retries = 0
+            try:
+                while start < len(ids_ref):
+                    n = min(len(ids_ref) - start, local_batch_size)
+                    end = start + n
+                    emitted_ids = ids_ref[start:end]
+
+                    if (
+                        known_ids is None
+                        and precheck_pages
+                        and precheck_gets >= precheck_pages
+                    ):
+                        precheck_pages = 0
+                        load_precheck_ids()
+                    if known_ids is not None:
+                        existing_list = [
+                            doc_id for doc_id in emitted_ids if doc_id in known_ids
+                        ]
+                    else:
+                        if id_filter is not None:
+                            candidate_ids = [
+                                doc_id for doc_id in emitted_ids if doc_id in id_filter
+                            ]
                         else:
-                            dup_set = set(dup_set)
-                        if not dup_set:
-                            raise
-                        before = len(ids_ref)
-                        filtered = [
+                            candidate_ids = emitted_ids
+                            precheck_gets += 1
+                        try:
+                            existing_resp = (
+                                collection_ref.get(ids=candidate_ids, include=[])
+                                if candidate_ids
+                                else {"ids": []}
+                            )
+                            existing_list = (
+                                existing_resp.get("ids")
+                                if isinstance(existing_resp, Mapping)
+                                else None
+                            )
+                        except Exception as exc:  # pragma: no cover - defensive
+                            logging.warning(
+                                "Failed to precheck duplicates for %s: %s",
+                                model_key,
+                                exc,
+                            )
+                            existing_list = None
+                    if existing_list:
+                        existing_set = frozenset(existing_list)
+                        kept = [
                             (i, d, m, t, r)
                             for i, d, m, t, r in zip(
-                                ids_ref,
-                                documents_ref,
-                                metadatas_ref,
-                                token_counts_ref,
-                                row_numbers_ref,
+                                emitted_ids,
+                                documents_ref[start:end],
+                                metadatas_ref[start:end],
+                                token_counts_ref[start:end],
+                                row_numbers_ref[start:end],
                             )
-                            if i not in dup_set
+                            if i not in existing_set
                         ]
-                        removed = before - len(filtered)
-                        if not removed:
-                            raise
-                        ids_ref[:] = [i for i, _, _, _, _ in filtered]
-                        documents_ref[:] = [d for _, d, _, _, _ in filtered]
-                        metadatas_ref[:] = [m for _, _, m, _, _ in filtered]
-                        token_counts_ref[:] = [t for _, _, _, t, _ in filtered]
-                        row_numbers_ref[:] = [r for _, _, _, _, r in filtered]
-                        current_token_total = sum(token_counts_ref)
-                        sample_ids = ", ".join(list(dup_set)[:5])
-                        if len(dup_set) > 5:
-                            sample_ids += ", ..."
+                        removed = n - len(kept)
+                        if removed:
+                            sample = ", ".join(islice(existing_set, 5))
+                            if len(existing_set) > 5:
+                                sample += ", ..."
+                            logging.info(
+                                "Preemptively removing %s duplicate id(s) for %s before upsert: %s",
+                                format_int(removed),
+                                model_key,
+                                sample,
+                            )
+                            # One compaction pass per buffer instead of shifting
+                            # the tail once per duplicate.
+                            kept_tokens = [t for _, _, _, t, _ in kept]
+                            current_token_total -= sum(
+                                token_counts_ref[start:end]
+                            ) - sum(kept_tokens)
+                            ids_ref[start:end] = [i for i, _, _, _, _ in kept]
+                            documents_ref[start:end] = [d for _, d, _, _, _ in kept]
+                            metadatas_ref[start:end] = [m for _, _, m, _, _ in kept]
+                            token_counts_ref[start:end] = kept_tokens
+                            row_numbers_ref[start:end] = [r for _, _, _, _, r in kept]
+                            continue
+
+                    # Keep the longest prefix within the limit (at least one
+                    # document); token counts are non-negative, so the running
+                    # totals are sorted.
+                    running_totals = list(accumulate(token_counts_ref[start:end]))
+                    n = max(1, bisect_right(running_totals, token_limit_value))
+                    emitted_token_total = running_totals[n - 1]
+
+                    if emitted_token_total > token_limit_value:
+                        single_tokens = emitted_token_total
+                        doc_id = ids_ref[start]
+                        if single_tokens > MAX_TOKENS_PER_REQUEST:
+                            logging.error(
+                                "Skipping document %s in %s: %s tokens exceed hard API limit %s.",
+                                doc_id,
+                                model_key,
+                                format_int(single_tokens),
+                                format_int(MAX_TOKENS_PER_REQUEST),
+                            )
+                            start += 1
+                            current_token_total -= single_tokens
+                            upsert_retries = 0
+                            continue
                         logging.warning(
-                            "Removed %s duplicate id(s) for %s before retry: %s",
-                            format_int(removed),
+                            "Document %s in %s is %s tokens (> %s safety limit); sending alone.",
+                            doc_id,
                             model_key,
-                            sample_ids,
-                        )
-                        retry_after_duplicate = True
-                        break
-                    except Exception as exc:  # pragma: no cover - defensive
-                        traceback_text = traceback.format_exc()
-                        error_path = _write_error_report(
-                            error_dir=error_dir,
-                            model_name=model_key,
-                            collection_name=collection_value,
-                            reason=reason,
-                            source_csv=source_csv,
-                            emitted_ids=emitted_ids,
-                            emitted_docs=emitted_docs,
-                            emitted_metas=emitted_metas,
-                            emitted_rows=emitted_rows,
-                            token_counts=emitted_tokens,
-                            token_total=emitted_token_total,
-                            resume_state=state_ref,
-                            exception=exc,
-                            traceback_text=traceback_text,
+                            format_int(single_tokens),
+                            format_int(token_limit_value),
                         )
+
+                    # The batch is settled; copy it out of the buffers once.
+                    end = start + n
+                    if n < len(emitted_ids):
+                        emitted_ids = emitted_ids[:n]
+                    emitted_docs = documents_ref[start:end]
+                    emitted_metas: List[MetadataDict] = metadatas_ref[start:end]
+                    emitted_tokens = token_counts_ref[start:end]
+                    emitted_rows = row_numbers_ref[start:end]
+
+                    if n < local_batch_size:
+                        if logging.getLogger().isEnabledFor(logging.INFO):
+                            logging.info(
+                                "Adjusting effective batch size for %s from %s to "
+                                "%s due to token limits (%s tokens, reason=%s).",
+                                model_key,
+                                format_int(effective_batch_size),
+                                format_int(n),
+                                format_int(emitted_token_total),
+                                reason,
+                            )
+                        batch_limit = max(1, n)
+                        effective_batch_size = batch_limit
+                        local_batch_size = batch_limit
+
+                    retry_after_duplicate = False
+                    while True:
                         try:
-                            context_chunks = []
-                            for doc_id, row_num, meta in zip(
-                                emitted_ids, emitted_rows, emitted_metas
-                            ):
-                                try:
-                                    metadata_bytes = len(json.dumps(meta, default=str))
-                                except (TypeError, ValueError):
-                                    metadata_bytes = -1
-                                context_chunks.append(
-                                    f"id={doc_id} row={row_num} metadata_bytes={metadata_bytes}"
+                            collection_ref.upsert(
+                                ids=emitted_ids,
+                                documents=emitted_docs,
+                                metadatas=emitted_metas,  # type: ignore[arg-type]
+                            )
+                        except chroma_errors.DuplicateIDError as exc:
+                            dup_ids = getattr(exc, "ids", None)
+                            dup_set: FrozenSet[str] = frozenset(
+                                _DUPLICATE_ID_PATTERN.findall(str(exc))
+                                if dup_ids is None
+                                else dup_ids
+                            )
+                            if not dup_set:
+                                raise
+                            before = len(ids_ref) - start
+                            filtered = [
+                                (i, d, m, t, r)
+                                for i, d, m, t, r in zip(
+                                    ids_ref[start:],
+                                    documents_ref[start:],
+                                    metadatas_ref[start:],
+                                    token_counts_ref[start:],
+                                    row_numbers_ref[start:],
+                                )
+                                if i not in dup_set
+                            ]
+                            removed = before - len(filtered)
+                            if not removed:
+                                raise
+                            current_token_total -= sum(
+                                tokens
+                                for doc_id, tokens in zip(
+                                    ids_ref[start:], token_counts_ref[start:]
                                 )
-                            context_summary = (
-                                "; ".join(context_chunks)
-                                if context_chunks
-                                else "no rows"
+                                if doc_id in dup_set
                             )
-                        except Exception:  # pragma: no cover - defensive
-                            context_summary = "unable to summarise batch"
-                        logging.exception(
-                            "Chroma upsert failed for model %s (csv=%s, reason=%s). Rows: %s",
-                            model_key,
-                            source_csv,
-                            reason,
-                            context_summary,
-                        )
-                        if error_path is not None:
-                            logging.error(
-                                "Error report for model %s persisted to %s",
+                            ids_ref[start:] = [i for i, _, _, _, _ in filtered]
+                            documents_ref[start:] = [d for _, d, _, _, _ in filtered]
+                            metadatas_ref[start:] = [m for _, _, m, _, _ in filtered]
+                            token_counts_ref[start:] = [t for _, _, _, t, _ in filtered]
+                            row_numbers_ref[start:] = [r for _, _, _, _, r in filtered]
+                            sample_ids = ", ".join(islice(dup_set, 5))
+                            if len(dup_set) > 5:
+                                sample_ids += ", ..."
+                            logging.warning(
+                                "Removed %s duplicate id(s) for %s before retry: %s",
+                                format_int(removed),
                                 model_key,
-                                error_path,
+                                sample_ids,
                             )
-                        raise
-                    else:
-                        break
+                            retry_after_duplicate = True
+                            break
+                        except Exception as exc:
+                            delay = _upsert_retry_delay(exc, upsert_retries)
+                            if delay is not None:
+                                upsert_retries += 1
+                                logging.warning(
+                                    "Upsert for %s failed (%s); retry %d of %d "
+                                    "in %.1fs.",
+                                    model_key,
+                                    exc,
+                                    upsert_retries,
+                                    UPSERT_MAX_RETRIES,
+                                    delay,
+                                )
+                                time.sleep(delay)
+                                continue
+                            # Only the error report needs the formatted text;
+                            # logging.exception below formats its own.
+                            traceback_text = (
+                                traceback.format_exc() if error_dir is not None else ""
+                            )
+                            error_path = _write_error_report(
+                                error_dir=error_dir,
+                                model_name=model_key,
+                                collection_name=collection_value,
+                                reason=reason,
+                                source_csv=source_csv,
+                                emitted_ids=emitted_ids,
+                                emitted_docs=emitted_docs,
+                                emitted_metas=emitted_metas,
+                                emitted_rows=emitted_rows,
+                                token_counts=emitted_tokens,
+                                token_total=emitted_token_total,
+                                resume_state=state_ref,
+                                exception=exc,
+                                traceback_text=traceback_text,
+                            )
+                            try:
+                                context_chunks = []
+                                for doc_id, row_num, meta in zip(
+                                    emitted_ids, emitted_rows, emitted_metas
+                                ):
+                                    try:
+                                        metadata_bytes = len(
+                                            json.dumps(meta, default=str)
+                                        )
+                                    except (TypeError, ValueError):
+                                        metadata_bytes = -1
+                                    context_chunks.append(
+                                        f"id={doc_id} row={row_num} metadata_bytes={metadata_bytes}"
+                                    )
+                                context_summary = (
+                                    "; ".join(context_chunks)
+                                    if context_chunks
+                                    else "no rows"
+                                )
+                            except Exception:  # pragma: no cover - defensive
+                                context_summary = "unable to summarise batch"
+                            logging.exception(
+                                "Chroma upsert failed for model %s (csv=%s, reason=%s). Rows: %s",
+                                model_key,
+                                source_csv,
+                                reason,
+                                context_summary,
+                            )
+                            if error_path is not None:
+                                logging.error(
+                                    "Error report for model %s persisted to %s",
+                                    model_key,
+                                    error_path,
+                                )
+                            raise
+                        else:
+                            break
 
-                if retry_after_duplicate:
-                    continue
+                    if retry_after_duplicate:
+                        continue
 
-                added += len(emitted_ids)
-                batches += 1
-                collection_count_so_far += len(emitted_ids)
-                logging.info(
-                    "Indexed %s batch %d (+%d docs, %s tokens, total %d) [reason=%s]",
-                    model_key,
-                    batches,
-                    len(emitted_ids),
-                    format_int(emitted_token_total),
-                    added,
-                    reason,
-                )
-                persist_state(
-                    False,
-                    documents_indexed=added,
-                    collection_total=collection_count_so_far,
-                    signature=signature,
-                    state=state_ref,
-                )
-                del ids_ref[:n]
-                del documents_ref[:n]
-                del metadatas_ref[:n]
-                del token_counts_ref[:n]
-                del row_numbers_ref[:n]
-                current_token_total = sum(token_counts_ref)
-
-                if not ids_ref:
-                    break
-
-                if (
-                    len(ids_ref) < local_batch_size
-                    and current_token_total <= token_limit
-                ):
-                    break
+                    if known_ids is not None:
+                        if len(known_ids) + len(emitted_ids) > KNOWN_ID_LIMIT:
+                            logging.info(
+                                "Tracked %s document IDs; duplicate prechecks "
+                                "now use an approximate filter.",
+                                format_int(len(known_ids)),
+                            )
+                            id_filter = _IdFilter(
+                                2 * KNOWN_ID_LIMIT, KNOWN_ID_FILTER_ERROR_RATE
+                            )
+                            id_filter.update(known_ids)
+                            id_filter.update(emitted_ids)
+                            known_ids = None
+                        else:
+                            known_ids.update(emitted_ids)
+                    elif id_filter is not None:
+                        id_filter.update(emitted_ids)
+                        if id_filter.full:
+                            logging.info(
+                                "Duplicate precheck filter passed its capacity "
+                                "of %s IDs; reloading it from the collection.",
+                                format_int(id_filter.capacity),
+                            )
+                            id_filter = None
+                            load_precheck_ids()
+                    added += len(emitted_ids)
+                    batches += 1
+                    unpersisted_batches += 1
+                    collection_count_so_far += len(emitted_ids)
+                    if logging.getLogger().isEnabledFor(logging.INFO):
+                        logging.info(
+                            "Indexed %s batch %d (+%d docs, %s tokens, total %d) "
+                            "[reason=%s]",
+                            model_key,
+                            batches,
+                            len(emitted_ids),
+                            format_int(emitted_token_total),
+                            added,
+                            reason,
+                        )
+                    persist_state(
+                        False,
+                        documents_indexed=added,
+                        collection_total=collection_count_so_far,
+                        signature=signature,
+                        state=state_ref,
+                        write=(
+                            unpersisted_batches >= STATE_PERSIST_INTERVAL
+                            or time.monotonic() - last_persist_time
+                            >= STATE_PERSIST_SECONDS
+                        ),
+                    )
+                    start = end
+                    current_token_total -= emitted_token_total
+                    upsert_retries = 0
+
+                    if (
+                        len(ids_ref) - start < local_batch_size
+                        and current_token_total <= token_limit
+                    ):
+                        break
+            finally:
+                if start:
+                    del ids_ref[:start]
+                    del documents_ref[:start]
+                    del metadatas_ref[:start]
+                    del token_counts_ref[:start]
+                    del row_numbers_ref[:start]
 
             return batch_limit
 
@@ -727,12 +1239,20 @@ def index_from_config(
             return compactor_ref
 
         def hard_trim_to_byte_limit(
-            value: str, limit: int = CHROMA_DOCUMENT_SIZE_LIMIT
+            value: str,
+            limit: int = CHROMA_DOCUMENT_SIZE_LIMIT,
+            encoded: Optional[bytes] = None,
         ) -> str:
-            encoded = value.encode("utf-8")
+            if encoded is None:
+                encoded = value.encode("utf-8")
             if len(encoded) <= limit:
                 return value
-            return encoded[:limit].decode("utf-8", errors="ignore").rstrip()
+            # Back up over UTF-8 continuation bytes (0b10xxxxxx) to the start
+            # of the code point straddling the limit; at most three steps.
+            cut = limit
+            while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+                cut -= 1
+            return encoded[:cut].decode("utf-8").rstrip()
 
         skip_state_persisted = False
 
@@ -792,6 +1312,7 @@ def index_from_config(
             text: str,
             metadata: MetadataDict,
             source_csv: Path,
+            token_count: Optional[int] = None,
             ids_list: List[str] = ids,
             documents_list: List[str] = documents,
             metadatas_list: List[MetadataDict] = metadatas,
@@ -805,7 +1326,12 @@ def index_from_config(
 
             current_batch_size = effective_batch_size
 
-            original_bytes = len(text.encode("utf-8"))
+            # Any text of at most LIMIT / 4 characters fits without encoding.
+            original_bytes = (
+                len(text.encode("utf-8"))
+                if len(text) * 4 > CHROMA_DOCUMENT_SIZE_LIMIT
+                else 0
+            )
             if original_bytes > CHROMA_DOCUMENT_SIZE_LIMIT:
                 metadata["original_bytes"] = int(original_bytes)
                 compactor_instance = get_document_compactor()
@@ -819,7 +1345,8 @@ def index_from_config(
                     text = result.text
                     if result.was_compacted:
                         metadata["compacted"] = True
-                adjusted_bytes = len(text.encode("utf-8"))
+                encoded = text.encode("utf-8")
+                adjusted_bytes = len(encoded)
                 if adjusted_bytes > CHROMA_DOCUMENT_SIZE_LIMIT:
                     logging.warning(
                         (
@@ -830,13 +1357,18 @@ def index_from_config(
                         model_key,
                         format_int(CHROMA_DOCUMENT_SIZE_LIMIT),
                     )
-                    text = hard_trim_to_byte_limit(text, CHROMA_DOCUMENT_SIZE_LIMIT)
+                    text = hard_trim_to_byte_limit(
+                        text, CHROMA_DOCUMENT_SIZE_LIMIT, encoded
+                    )
                     adjusted_bytes = len(text.encode("utf-8"))
                     metadata["compaction_fallback"] = "hard_trim"
                     metadata["compacted"] = True
                 if adjusted_bytes != original_bytes:
                     metadata["compacted_bytes"] = int(adjusted_bytes)
-            token_count = count_tokens(text, encoder)
+                # A count taken ahead of time is for the original text.
+                token_count = None
+            if token_count is None:
+                token_count = count_tokens(text, encoder)
             current_batch_size = effective_batch_size
 
             # Handle oversized documents with intelligent truncation
@@ -986,52 +1518,75 @@ def index_from_config(
                 current_batch_size = effective_batch_size
             return
 
-        document_iterable = iter_documents(
-            model_name,
-            csv_path,
-            spec,
-            model_config.columns,
-            skip=skip_rows,
-            resume_state=resume_state,
-            on_skip_complete=handle_skip_complete if skip_rows else None,
-            extra_metadata=combined_metadata,
-            schema_version=schema_version_int,
-        )
-
-        if e2e_config is not None:
-            sampled_documents = e2e_config.sample_documents(
-                model_name=model_name,
-                csv_path=csv_path,
-                documents=document_iterable,
+        def open_documents(state: ResumeState) -> Iterator[DocumentPayload]:
+            return iter_documents(
+                model_name,
+                csv_path,
+                spec,
+                model_config.columns,
+                skip=skip_rows,
+                resume_state=state,
+                on_skip_complete=handle_skip_complete if skip_rows else None,
+                extra_metadata=combined_metadata,
+                schema_version=schema_version_int,
             )
-            for sample in sampled_documents:
-                process_document(
-                    sample.row_index,
-                    sample.doc_id,
-                    sample.text,
-                    sample.metadata,
-                    source_csv=csv_path,
+
+        try:
+            if e2e_config is not None:
+                sampled_documents = e2e_config.sample_documents(
+                    model_name=model_name,
+                    csv_path=csv_path,
+                    documents=open_documents(resume_state),
                 )
-        else:
-            for row_index, doc_id, text, metadata in document_iterable:
-                process_document(
+                for sample in sampled_documents:
+                    process_document(
+                        sample.row_index,
+                        sample.doc_id,
+                        sample.text,
+                        sample.metadata,
+                        source_csv=csv_path,
+                    )
+            else:
+                for (
                     row_index,
                     doc_id,
                     text,
                     metadata,
-                    source_csv=csv_path,
-                )
+                ), token_count in _prefetch_documents(
+                    open_documents, resume_state, encoder
+                ):
+                    process_document(
+                        row_index,
+                        doc_id,
+                        text,
+                        metadata,
+                        source_csv=csv_path,
+                        token_count=token_count,
+                    )
 
-        effective_batch_size = flush_batch(
-            "final",
-            ids_ref=ids,
-            documents_ref=documents,
-            metadatas_ref=metadatas,
-            token_counts_ref=token_counts,
-            row_numbers_ref=row_numbers,
-            source_csv=csv_path,
-            batch_limit=effective_batch_size,
-        )
+            effective_batch_size = flush_batch(
+                "final",
+                ids_ref=ids,
+                documents_ref=documents,
+                metadatas_ref=metadatas,
+                token_counts_ref=token_counts,
+                row_numbers_ref=row_numbers,
+                source_csv=csv_path,
+                batch_limit=effective_batch_size,
+            )
+        except BaseException:
+            # The in-memory state already reflects the last batch that reached
+            # the collection; write it so a resume does not redo those batches.
+            if unpersisted_batches and completion_state_path:
+                try:
+                    save_completion_state(completion_state_path, completion_state)
+                except OSError as exc:
+                    logging.warning(
+                        "Failed to update completion metadata for %s: %s",
+                        model_name,
+                        exc,
+                    )
+            raise
 
         counts[model_name] = added
         persist_state(
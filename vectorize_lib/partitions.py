@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 from typing import List, Mapping, Tuple
 
+from .utils import json_loads
+
 PARTITION_MANIFEST_VERSION = 1
 
 
@@ -13,7 +14,7 @@ def load_partition_manifest_entries(
     manifest_path: Path, default_config_name: str
 ) -> List[Tuple[str, Path, Path]]:
     """Return ordered partition manifest entries (name, directory, config path)."""
-    raw = json.loads(manifest_path.read_text(encoding="utf-8"))
+    raw = json_loads(manifest_path.read_bytes())
     if not isinstance(raw, Mapping):
         raise ValueError("Partition manifest must contain a JSON object.")
     version = raw.get("version")
@@ -2,20 +2,250 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
+import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Optional, Set
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from .utils import json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+RESUME_STATE_SUFFIX = "_resume_state.json"
+RESUME_STATE_READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+QUERY_CONFIG_CACHE_NAME = ".query_config_cache.json"
+# Bump when the generated query config layout changes to invalidate caches.
+QUERY_CONFIG_CACHE_VERSION = 1
+
+
+def _scan_partition_dirs(partition_out_dir: Path) -> List[Tuple[str, str]]:
+    """Return (partition_name, path) pairs for partition subdirectories, by name.
+
+    Uses ``os.scandir`` so directory type checks come from the cached
+    ``d_type`` and no intermediate ``Path`` objects are created. Names are
+    interned because they repeat across every model that lives in them.
+    """
+    with os.scandir(partition_out_dir) as entries:
+        partitions = [
+            (sys.intern(entry.name), entry.path) for entry in entries if entry.is_dir()
+        ]
+    partitions.sort()
+    return partitions
+
+
+def _read_indexed_models(resume_file: str) -> Optional[List[Tuple[str, int]]]:
+    """Return (model_name, collection_count) for models indexed in a resume file.
+
+    Only ``started`` and ``collection_count`` feed the query config, so the
+    parsed resume state is projected down to those pairs here and the full
+    payload is dropped as soon as the worker finishes with it. Returns None if
+    the file is unusable.
+
+    Runs on worker threads, so failures are logged here rather than raised to
+    keep one bad file from cancelling its siblings.
+    """
+    try:
+        with open(resume_file, "rb") as handle:
+            resume_data = json_loads(handle.read())
+    except (OSError, ValueError) as exc:
+        logger.warning("Failed to read resume state file %s: %s", resume_file, exc)
+        return None
+
+    if not isinstance(resume_data, dict):
+        logger.warning(
+            "Resume state file %s does not contain a JSON object", resume_file
+        )
+        return None
+
+    indexed: List[Tuple[str, int]] = []
+    for model_name, model_state in resume_data.items():
+        if not isinstance(model_state, Mapping):
+            continue
+
+        # Check if this model was completed (not in error state)
+        if not model_state.get("started"):
+            continue
+
+        # Check if model has been indexed (collection_count > 0)
+        collection_count = model_state.get("collection_count", 0)
+        if not isinstance(collection_count, int) or collection_count <= 0:
+            continue
+
+        # Interned so every file mentioning a model shares one key object.
+        indexed.append((sys.intern(model_name), collection_count))
+    return indexed
+
+
+def _scan_resume_state_files(partition_path: str) -> List[Tuple[str, str]]:
+    """Return (collection_name, path) pairs for resume state files in a partition.
+
+    Resume state files are named ``<collection_name>_resume_state.json``.
+    """
+    with os.scandir(partition_path) as entries:
+        resume_files = [
+            (sys.intern(entry.name[: -len(RESUME_STATE_SUFFIX)]), entry.path)
+            for entry in entries
+            if entry.name.endswith(RESUME_STATE_SUFFIX)
+        ]
+    resume_files.sort()
+    return resume_files
+
+
+def _generated_at() -> str:
+    """Return the current UTC time as stamped into ``metadata.generated_at``."""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds")
+
+
+def _aggregate_query_config(
+    partition_out_dir: Path,
+    resume_targets: List[Tuple[str, str, str]],
+    collection_prefix: Optional[str],
+) -> Dict[str, Any]:
+    """Read resume state files and fold them into a query config dictionary."""
+    # Map model_name -> {collections: Set[str], documents: int, partitions: List[str]}
+    model_info: Dict[str, Dict[str, Any]] = defaultdict(
+        lambda: {"collections": set(), "documents": 0, "partitions": []}
+    )
+
+    # Map collection_name -> Set[model_name]
+    collection_to_models: Dict[str, Set[str]] = defaultdict(set)
+
+    # Track all collections we've seen
+    all_collections: Set[str] = set()
+
+    # Resume state files are small and independent, so read and parse them
+    # concurrently; aggregation below stays on this thread and in scan order.
+    resume_paths = [resume_file for _, _, resume_file in resume_targets]
+    if len(resume_paths) > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(RESUME_STATE_READ_WORKERS, len(resume_paths))
+        ) as executor:
+            resume_payloads = list(executor.map(_read_indexed_models, resume_paths))
+    else:
+        resume_payloads = [_read_indexed_models(path) for path in resume_paths]
+
+    for (partition_name, collection_name, _), indexed_models in zip(
+        resume_targets, resume_payloads
+    ):
+        if indexed_models is None:
+            continue
+
+        all_collections.add(collection_name)
+
+        for model_name, collection_count in indexed_models:
+            # Add this collection to the model's collection list
+            info = model_info[model_name]
+            info["collections"].add(collection_name)
+            info["documents"] += collection_count
+            # Targets arrive in sorted partition order, so the list stays
+            # sorted and a repeat can only be the last element.
+            partitions = info["partitions"]
+            if not partitions or partitions[-1] != partition_name:
+                partitions.append(partition_name)
+
+            # Add this model to the collection's model list
+            collection_to_models[collection_name].add(model_name)
+
+    # Convert sets to sorted lists for JSON serialization
+    model_to_collections: Dict[str, Dict[str, Any]] = {}
+    for model_name, info in model_info.items():
+        model_to_collections[model_name] = {
+            "collections": sorted(info["collections"]),
+            "total_documents": info["documents"],
+            "partitions": info["partitions"],
+        }
+
+    collection_to_models_serialized: Dict[str, List[str]] = {
+        coll: sorted(models) for coll, models in collection_to_models.items()
+    }
+
+    # Build metadata
+    metadata = {
+        "total_collections": len(all_collections),
+        "total_models": len(model_to_collections),
+        "generated_at": _generated_at(),
+        "partition_out_dir": str(partition_out_dir.resolve()),
+    }
+
+    if collection_prefix:
+        metadata["collection_prefix"] = collection_prefix
+
+    return {
+        "model_to_collections": model_to_collections,
+        "collection_to_models": collection_to_models_serialized,
+        "metadata": metadata,
+    }
+
+
+def _resume_state_signature(
+    partition_out_dir: Path,
+    resume_targets: List[Tuple[str, str, str]],
+    collection_prefix: Optional[str],
+) -> Optional[str]:
+    """Fingerprint the inputs of a query config from resume state file stats.
+
+    Covers every resume state file's location, ``st_mtime_ns`` and size plus
+    the options that end up in the config metadata. Returns None if a file
+    vanished mid-scan, in which case the cache is bypassed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        f"{QUERY_CONFIG_CACHE_VERSION}\0{partition_out_dir.resolve()}"
+        f"\0{collection_prefix or ''}".encode("utf-8")
+    )
+    for partition_name, collection_name, resume_file in resume_targets:
+        try:
+            stat_result = os.stat(resume_file)
+        except OSError:
+            return None
+        digest.update(
+            f"\0{partition_name}/{collection_name}"
+            f"\0{stat_result.st_mtime_ns}\0{stat_result.st_size}".encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+def _load_cached_query_config(
+    cache_path: Path, signature: str
+) -> Optional[Dict[str, Any]]:
+    """Return the cached query config if it was built from identical inputs."""
+    try:
+        cached = json_loads(cache_path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.debug("Ignoring unreadable query config cache %s: %s", cache_path, exc)
+        return None
+    if not isinstance(cached, dict) or cached.get("signature") != signature:
+        return None
+    query_config = cached.get("query_config")
+    return query_config if isinstance(query_config, dict) else None
+
+
+def _store_cached_query_config(
+    cache_path: Path, signature: str, query_config: Dict[str, Any]
+) -> None:
+    """Persist the query config alongside its input signature (best effort)."""
+    try:
+        cache_path.write_bytes(
+            json_dumps({"signature": signature, "query_config": query_config})
+        )
+    except OSError as exc:
+        logger.warning("Failed to write query config cache %s: %s", cache_path, exc)
+
 
 def generate_query_config(
     partition_out_dir: Path,
     *,
     output_path: Optional[Path] = None,
     collection_prefix: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """Generate query configuration by scanning resume state files.
 
@@ -23,6 +253,9 @@ def generate_query_config(
         partition_out_dir: Directory containing partition subdirectories
         output_path: Optional path to write the query config JSON file
         collection_prefix: Optional prefix used for collection names
+        use_cache: Reuse ``.query_config_cache.json`` in ``partition_out_dir``
+            when no resume state file changed since it was written (compared
+            by path, mtime and size); the cache is refreshed otherwise
 
     Returns:
         Dictionary mapping model names to their collections with metadata
@@ -46,134 +279,57 @@ def generate_query_config(
         }
     }
     """
-    from datetime import datetime, timezone
-
     if not partition_out_dir.exists() or not partition_out_dir.is_dir():
         raise ValueError(
             f"Partition output directory {partition_out_dir} does not exist "
             "or is not a directory"
         )
 
-    # Map model_name -> {collections: Set[str], documents: int, partitions: Set[str]}
-    model_info: Dict[str, Dict[str, Any]] = defaultdict(
-        lambda: {"collections": set(), "documents": 0, "partitions": set()}
-    )
-
-    # Map collection_name -> Set[model_name]
-    collection_to_models: Dict[str, Set[str]] = defaultdict(set)
-
-    # Track all collections we've seen
-    all_collections: Set[str] = set()
-
-    # Scan each partition directory
-    partition_dirs = sorted(
-        [entry for entry in partition_out_dir.iterdir() if entry.is_dir()],
-        key=lambda p: p.name,
-    )
+    partition_entries = _scan_partition_dirs(partition_out_dir)
 
-    if not partition_dirs:
+    if not partition_entries:
         logger.warning("No partition subdirectories found in %s", partition_out_dir)
 
-    for partition_dir in partition_dirs:
-        partition_name = partition_dir.name
-
+    resume_targets: List[Tuple[str, str, str]] = []
+    for partition_name, partition_path in partition_entries:
         # Find all resume state files in this partition directory
-        resume_files = list(partition_dir.glob("*_resume_state.json"))
+        resume_files = _scan_resume_state_files(partition_path)
 
         if not resume_files:
             logger.debug("No resume state files found in partition %s", partition_name)
             continue
 
-        for resume_file in resume_files:
-            try:
-                resume_data = json.loads(resume_file.read_text(encoding="utf-8"))
-            except (OSError, json.JSONDecodeError) as exc:
-                logger.warning(
-                    "Failed to read resume state file %s: %s", resume_file, exc
-                )
-                continue
-
-            if not isinstance(resume_data, dict):
-                logger.warning(
-                    "Resume state file %s does not contain a JSON object", resume_file
-                )
-                continue
-
-            # Extract collection name from filename
-            # Format: <collection_name>_resume_state.json
-            filename = resume_file.stem  # Remove .json
-            if filename.endswith("_resume_state"):
-                collection_name = filename[: -len("_resume_state")]
-            else:
-                logger.warning(
-                    "Unexpected resume state filename format: %s", resume_file.name
-                )
-                continue
-
-            all_collections.add(collection_name)
-
-            # Process each model in the resume state
-            for model_name, model_state in resume_data.items():
-                if not isinstance(model_state, Mapping):
-                    continue
-
-                # Check if this model was completed (not in error state)
-                if not model_state.get("started"):
-                    continue
-
-                # Check if model has been indexed (collection_count > 0)
-                collection_count = model_state.get("collection_count", 0)
-                if not isinstance(collection_count, int) or collection_count <= 0:
-                    continue
-
-                # Add this collection to the model's collection list
-                model_info[model_name]["collections"].add(collection_name)
-                model_info[model_name]["documents"] += collection_count
-                model_info[model_name]["partitions"].add(partition_name)
-
-                # Add this model to the collection's model list
-                collection_to_models[collection_name].add(model_name)
-
-    # Convert sets to sorted lists for JSON serialization
-    model_to_collections: Dict[str, Dict[str, Any]] = {}
-    for model_name, info in model_info.items():
-        model_to_collections[model_name] = {
-            "collections": sorted(info["collections"]),
-            "total_documents": info["documents"],
-            "partitions": sorted(info["partitions"]),
-        }
-
-    collection_to_models_serialized: Dict[str, List[str]] = {
-        coll: sorted(models) for coll, models in collection_to_models.items()
-    }
-
-    # Build metadata
-    metadata = {
-        "total_collections": len(all_collections),
-        "total_models": len(model_to_collections),
-        "generated_at": datetime.now(timezone.utc)
-        .replace(tzinfo=None)
-        .isoformat(timespec="seconds"),
-        "partition_out_dir": str(partition_out_dir.resolve()),
-    }
-
-    if collection_prefix:
-        metadata["collection_prefix"] = collection_prefix
+        for collection_name, resume_file in resume_files:
+            resume_targets.append((partition_name, collection_name, resume_file))
 
-    query_config = {
-        "model_to_collections": model_to_collections,
-        "collection_to_models": collection_to_models_serialized,
-        "metadata": metadata,
-    }
+    signature: Optional[str] = None
+    cache_path = partition_out_dir / QUERY_CONFIG_CACHE_NAME
+    if use_cache:
+        signature = _resume_state_signature(
+            partition_out_dir, resume_targets, collection_prefix
+        )
+    cached = (
+        _load_cached_query_config(cache_path, signature)
+        if signature is not None
+        else None
+    )
+    if cached is not None:
+        logger.debug("Reusing cached query config from %s", cache_path)
+        query_config = cached
+        # Only the aggregation is cached; this config is generated now.
+        query_config.setdefault("metadata", {})["generated_at"] = _generated_at()
+    else:
+        query_config = _aggregate_query_config(
+            partition_out_dir, resume_targets, collection_prefix
+        )
+        if signature is not None:
+            _store_cached_query_config(cache_path, signature, query_config)
 
     # Write to file if output_path is specified
     if output_path is not None:
         try:
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(
-                json.dumps(query_config, indent=2, sort_keys=False),
-                encoding="utf-8",
-            )
+            output_path.write_bytes(json_dumps(query_config, indent=True))
             logger.info("Query config written to %s", output_path)
         except OSError as exc:
             logger.error("Failed to write query config to %s: %s", output_path, exc)
@@ -198,7 +354,7 @@ def load_query_config(config_path: Path) -> Dict[str, Any]:
         raise ValueError(f"Query config file {config_path} does not exist")
 
     try:
-        config = json.loads(config_path.read_text(encoding="utf-8"))
+        config = json_loads(config_path.read_bytes())
     except (OSError, json.JSONDecodeError) as exc:
         raise ValueError(
             f"Failed to read query config from {config_path}: {exc}"
@@ -237,15 +393,26 @@ def get_collections_for_models(
         # Query all collections
         return sorted(query_config["collection_to_models"].keys())
 
-    collections: Set[str] = set()
     model_to_collections = query_config["model_to_collections"]
 
+    if len(model_names) == 1:
+        # Generated configs store each model's collections sorted and unique,
+        # so skip the set; sorted() is linear on already-sorted input and
+        # still guards hand-edited configs.
+        entry = model_to_collections.get(model_names[0])
+        if entry is None:
+            logger.warning(
+                "Model %s not found in query config; skipping", model_names[0]
+            )
+            return []
+        return sorted(entry["collections"])
+
+    collections: Set[str] = set()
     for model_name in model_names:
-        if model_name not in model_to_collections:
+        entry = model_to_collections.get(model_name)
+        if entry is None:
             logger.warning("Model %s not found in query config; skipping", model_name)
             continue
-
-        model_colls = model_to_collections[model_name]["collections"]
-        collections.update(model_colls)
+        collections.update(entry["collections"])
 
     return sorted(collections)
@@ -4,12 +4,29 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Mapping, Optional, Tuple
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from chromadb.api import Collection
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
 
 TOKEN_SAFETY_LIMIT = 250_000
 MAX_TOKENS_PER_REQUEST = 300_000
@@ -17,6 +34,27 @@ TOKEN_BUFFER = MAX_TOKENS_PER_REQUEST - TOKEN_SAFETY_LIMIT
 MAX_DOCS_PER_REQUEST = 2_048
 
 
+def json_loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON text or UTF-8 bytes, using orjson when it is installed.
+
+    Decode errors are raised as ``json.JSONDecodeError`` (orjson's error type
+    subclasses it), so existing ``except`` clauses keep working.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(payload: Any, *, indent: bool = False) -> bytes:
+    """Serialize ``payload`` to UTF-8 JSON bytes, using orjson when it is installed.
+
+    ``indent=True`` produces the same two-space layout as ``json.dumps(indent=2)``.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(payload, indent=2 if indent else None).encode("utf-8")
+
+
 def format_int(value: int) -> str:
     """Return human-friendly representation for integers with thousands separators."""
     return f"{value:,}"
@@ -44,10 +82,35 @@ def get_token_encoder(model_name: str):
 
 
 def count_tokens(text: str, encoder: Any) -> int:
-    """Return token count for a string using the provided encoder."""
+    """Return token count for a string using the provided encoder.
+
+    tiktoken encoders are called through ``encode_ordinary``, which skips the
+    special-token scan ``encode`` runs on every call. Text is embedded as
+    plain text, so ``<|...|>`` sequences in it are counted as ordinary text
+    rather than rejected.
+    """
     if not text:
         return 0
-    return len(encoder.encode(text))
+    encode = getattr(encoder, "encode_ordinary", None) or encoder.encode
+    return len(encode(text))
+
+
+def count_tokens_batch(
+    texts: Sequence[str], encoder: Any, num_threads: int = 1
+) -> List[int]:
+    """Return token counts for ``texts``, encoding them in parallel when possible.
+
+    tiktoken's ``encode_ordinary_batch`` releases the GIL for each text, so
+    with ``num_threads > 1`` the texts are spread across cores. Encoders
+    without a batch method are called once per text, like ``count_tokens``.
+    """
+    encode_batch = getattr(encoder, "encode_ordinary_batch", None) or getattr(
+        encoder, "encode_batch", None
+    )
+    if num_threads > 1 and encode_batch is not None and len(texts) > 1:
+        encoded = encode_batch(list(texts), num_threads=num_threads)
+        return [len(tokens) for tokens in encoded]
+    return [count_tokens(text, encoder) for text in texts]
 
 
 def load_completion_state(path: Optional[Path]) -> Dict[str, Any]:
@@ -57,7 +120,7 @@ def load_completion_state(path: Optional[Path]) -> Dict[str, Any]:
     if not path.exists():
         return {}
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
+        raw = json_loads(path.read_bytes())
         if isinstance(raw, dict):
             return raw
         logging.warning(
@@ -69,6 +132,21 @@ def load_completion_state(path: Optional[Path]) -> Dict[str, Any]:
     return {}
 
 
+def save_completion_state(
+    path: Path, state: Mapping[str, Any], *, indent: bool = True
+) -> None:
+    """Write the per-model completion metadata, replacing the file atomically.
+
+    The JSON is written to a sibling ``.tmp`` file and moved into place, so an
+    interrupted write never leaves a truncated state file behind. Mid-run
+    checkpoints pass ``indent=False`` for compact output.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_bytes(json_dumps(state, indent=indent))
+    os.replace(tmp_path, path)
+
+
 def get_path_signature(path: Path) -> Optional[Dict[str, float]]:
     """Return a simple fingerprint for the file so we can detect changes."""
     try:
@@ -78,6 +156,65 @@ def get_path_signature(path: Path) -> Optional[Dict[str, float]]:
     return {"mtime": stat.st_mtime, "size": stat.st_size}
 
 
+def iter_exception_chain(error: BaseException) -> Iterator[BaseException]:
+    """Yield an exception and its chained causes/contexts exactly once."""
+    seen: Set[int] = set()
+    stack = [error]
+    while stack:
+        current = stack.pop()
+        if not isinstance(current, BaseException):
+            continue
+        identity = id(current)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        yield current
+        cause = getattr(current, "__cause__", None)
+        context = getattr(current, "__context__", None)
+        if isinstance(cause, BaseException):
+            stack.append(cause)
+        if isinstance(context, BaseException):
+            stack.append(context)
+
+
+def extract_retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Extract the suggested retry delay (in seconds) if present."""
+    for candidate in iter_exception_chain(exc):
+        retry_after = getattr(candidate, "retry_after", None)
+        if isinstance(retry_after, (int, float)):
+            return float(retry_after)
+        error_payload = getattr(candidate, "error", None)
+        if isinstance(error_payload, Mapping):
+            direct = error_payload.get("retry_after")
+            if isinstance(direct, (int, float)):
+                return float(direct)
+            retry_ms = error_payload.get("retry_after_ms")
+            if isinstance(retry_ms, (int, float)):
+                return float(retry_ms) / 1000.0
+    return None
+
+
+def iter_collection_ids(collection: Collection, chunk_size: int) -> Iterator[List[str]]:
+    """Yield the IDs of every document in the collection, one page at a time."""
+    offset = 0
+    while True:
+        batch = collection.get(include=[], limit=chunk_size, offset=offset)
+        page = batch.get("ids") or []
+        if page:
+            yield page
+        offset += len(page)
+        if len(page) < chunk_size:
+            break
+
+
+def collection_ids(collection: Collection, chunk_size: int) -> Set[str]:
+    """Return the IDs of every document in the collection, fetched page by page."""
+    ids: Set[str] = set()
+    for page in iter_collection_ids(collection, chunk_size):
+        ids.update(page)
+    return ids
+
+
 def summarize_collection(
     collection: Collection,
     chunk_size: int,
@@ -10,7 +10,7 @@ from typing import Dict, Mapping
 from pydantic import ValidationError
 
 from .configuration import ModelConfig
-from .documents import normalize_row, remap_row
+from .documents import build_row_plan, normalize_row_values, row_validator
 from indexer.models import ModelSpec
 
 
@@ -23,19 +23,23 @@ def validate_csv_against_model(
     """Stream the CSV once to ensure headers exist and every row passes Pydantic validation."""
     try:
         with csv_path.open("r", encoding="utf-8-sig", newline="") as handle:
-            reader = csv.DictReader(handle)
-            if reader.fieldnames is None:
+            reader = csv.reader(handle)
+            fieldnames = next(reader, None)
+            if fieldnames is None:
                 logging.error(
                     "Validation failed for %s: no header found in %s",
                     model_name,
                     csv_path,
                 )
                 return False
-            for row_index, row in enumerate(reader, start=1):
-                remapped = remap_row(row, column_map)
-                normalized = normalize_row(remapped)
+            row_plan = build_row_plan(fieldnames, column_map, spec.model)
+            header_width = len(fieldnames)
+            validate_row = row_validator(spec.model)
+            # filter(None, ...) skips blank lines, as csv.DictReader did.
+            for row_index, row in enumerate(filter(None, reader), start=1):
+                normalized = normalize_row_values(row, row_plan, header_width)
                 try:
-                    spec.model(**normalized)
+                    validate_row(normalized)
                 except ValidationError as exc:
                     logging.error(
                         "Validation failed for %s: row %d in %s does not conform: %s",